@@ -11,7 +11,7 @@ import re
 from app.services.video_service import VideoService
 # from app.services.subtitle_service import SubtitleService  # Temporarily disabled
 from app.services.job_manager import JobManager
-from app.utils.download_utils import download_file
+from app.utils.download_utils import download_file, download_files
 
 app = Flask(__name__)
 CORS(app)
@@ -412,11 +412,10 @@ def process_join_job(job_id, data):
     try:
         job_manager.update_job_status(job_id, "processing")
         
-        # Download all videos
-        video_paths = []
-        for i, url in enumerate(data['urls']):
-            video_path = download_file(url, 'temp', f"{job_id}_input_{i}.mp4")
-            video_paths.append(video_path)
+        # Download all videos concurrently
+        video_paths = download_files(
+            data['urls'], 'temp', [f"{job_id}_input_{i}.mp4" for i in range(len(data['urls']))]
+        )
         
         # Join videos
         output_path = f"temp/{job_id}_joined.mp4"
@@ -483,6 +482,9 @@ def cleanup_all():
                         print(f"Warning: Could not remove job file {job_path}: {e}")
             cleanup_stats["directories_cleaned"].append(jobs_dir)
         
+        # Job files are gone - drop the in-memory copies too
+        job_manager.clear()
+        
         # 2. Clean up all temp files
         temp_dir = 'temp'
         if os.path.exists(temp_dir):
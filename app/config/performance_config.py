@@ -80,20 +80,23 @@ class PerformanceConfig:
             "memory_buffer_gb": max(0.5, total_memory * 0.1)  # 10% buffer
         }
     
-    def optimize_pytorch(self):
-        """Optimize PyTorch for maximum performance."""
+    def optimize_pytorch(self, num_threads: int = None):
+        """Optimize PyTorch for maximum performance (num_threads defaults to every core)."""
+        num_threads = num_threads or self.system_info["total_cpu_cores"]
+        
         # Set number of threads for PyTorch operations
-        torch.set_num_threads(self.system_info["total_cpu_cores"])
+        torch.set_num_threads(num_threads)
         
         # Enable optimizations
         torch.backends.cudnn.benchmark = True if torch.cuda.is_available() else False
         torch.set_grad_enabled(False)  # Disable gradients for inference
         
         # Set environment variables for performance
-        os.environ["OMP_NUM_THREADS"] = str(self.system_info["total_cpu_cores"])
-        os.environ["MKL_NUM_THREADS"] = str(self.system_info["total_cpu_cores"])
-        os.environ["VECLIB_MAXIMUM_THREADS"] = str(self.system_info["total_cpu_cores"])
-        os.environ["NUMEXPR_NUM_THREADS"] = str(self.system_info["total_cpu_cores"])
+        # (only read by libraries that haven't initialised their thread pools yet)
+        os.environ["OMP_NUM_THREADS"] = str(num_threads)
+        os.environ["MKL_NUM_THREADS"] = str(num_threads)
+        os.environ["VECLIB_MAXIMUM_THREADS"] = str(num_threads)
+        os.environ["NUMEXPR_NUM_THREADS"] = str(num_threads)
         
     def print_performance_info(self):
         """Print performance mode information."""
@@ -104,6 +107,6 @@ class PerformanceConfig:
         print(f"🎙️ Whisper Model: {self.get_whisper_config()['model']} (FP16: {self.get_whisper_config()['fp16']})")
         print(f"🎬 Video Workers: {self.get_video_processing_config()['workers']}")
         print(f"🔗 Parallel Chunks: {self.get_video_processing_config()['parallel_chunks']}")
-        print(f"⚡ PyTorch Threads: {self.system_info['pytorch_threads']}")
+        print(f"⚡ PyTorch Threads: {torch.get_num_threads()}")
         print(f"🎯 Max Concurrent Jobs: {self.get_resource_limits()['max_concurrent_jobs']}")
         print("=" * 50)
\ No newline at end of file
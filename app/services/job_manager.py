@@ -1,12 +1,106 @@
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+TERMINAL_STATUSES = ("completed", "failed")
+
 class JobManager:
+    """
+    Job store served from memory
+    
+    Every job has a JSON snapshot in jobs_dir, written on create/complete/fail. In-flight
+    status updates are appended to a write-ahead log instead of rewriting the snapshot;
+    the log is replayed into the snapshots on startup.
+    """
+    
+    # Progress must advance this much (or the status change) before an update is logged
+    PROGRESS_PERSIST_STEP = 5
+    
     def __init__(self, jobs_dir: str = "jobs"):
         self.jobs_dir = jobs_dir
         os.makedirs(jobs_dir, exist_ok=True)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Last logged progress of each in-flight job
+        self._persisted_progress: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wal_path = os.path.join(jobs_dir, "jobs.wal")
+        self._replay_wal()
+        self._wal_fd = self._open_wal()
+    
+    def _open_wal(self) -> int:
+        return os.open(self._wal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    
+    def _replay_wal(self) -> None:
+        """Fold logged status updates from a previous run into the job snapshots."""
+        if not os.path.exists(self._wal_path):
+            return
+        
+        replayed = {}
+        try:
+            with open(self._wal_path, 'r') as f:
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                    except ValueError:
+                        continue  # Torn final line from a crash
+                    job_id = delta.pop("job_id", None)
+                    if job_id not in replayed:
+                        replayed[job_id] = self._load_job(job_id) if job_id else None
+                    job = replayed[job_id]
+                    # Snapshots of finished jobs are newer than any logged update
+                    if job and job["status"] not in TERMINAL_STATUSES:
+                        job.update(delta)
+            
+            for job in replayed.values():
+                if job:
+                    self._save_job(job)
+            os.remove(self._wal_path)
+        except Exception as e:
+            print(f"Error replaying job log: {e}")
+    
+    def _append_wal(self, job: Dict[str, Any]) -> None:
+        entry = {key: job[key] for key in ("job_id", "status", "progress", "status_message", "updated_at")}
+        try:
+            os.write(self._wal_fd, (json.dumps(entry) + "\n").encode())
+        except OSError as e:
+            print(f"Error writing job log: {e}")
+    
+    def _cached_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Job dict from memory, else from its snapshot (call with the lock held)
+        
+        Only in-flight jobs stay in memory; finished ones are read from their snapshot
+        on each access, so the cache doesn't grow with the job history.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._load_job(job_id)
+            if job is not None and job["status"] not in TERMINAL_STATUSES:
+                self._jobs[job_id] = job
+        return job
+    
+    def _finish_job(self, job: Dict[str, Any]) -> None:
+        """Snapshot a finished job, evict it from memory and reset the log once nothing is in flight (call with the lock held)."""
+        self._save_job(job)
+        self._jobs.pop(job["job_id"], None)
+        self._persisted_progress.pop(job["job_id"], None)
+        if not self._persisted_progress:
+            try:
+                os.ftruncate(self._wal_fd, 0)
+            except OSError as e:
+                print(f"Error truncating job log: {e}")
+    
+    def clear(self) -> None:
+        """Forget cached jobs and restart the log (after the jobs directory was wiped)."""
+        with self._lock:
+            self._jobs.clear()
+            self._persisted_progress.clear()
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            os.close(self._wal_fd)
+            self._wal_fd = self._open_wal()
+            os.ftruncate(self._wal_fd, 0)
     
     def _get_job_file_path(self, job_id: str) -> str:
         return os.path.join(self.jobs_dir, f"{job_id}.json")
@@ -63,90 +157,106 @@ class JobManager:
             "subtitle_path": None
         }
         
-        self._save_job(job)
-        return job
+        with self._lock:
+            self._jobs[job_id] = job
+            self._persisted_progress[job_id] = 0
+            self._save_job(job)
+        return dict(job)
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve job information by job ID."""
-        job_file_path = self._get_job_file_path(job_id)
-        
-        if not os.path.exists(job_file_path):
-            return None
-        
+        with self._lock:
+            job = self._cached_job(job_id)
+            return dict(job) if job is not None else None
+    
+    def _load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job snapshot from disk."""
         try:
-            with open(job_file_path, 'r') as f:
-                return json.load(f)
+            # One open + read of the whole (small) snapshot; a missing file is a normal miss
+            with open(self._get_job_file_path(job_id), 'rb') as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
         except Exception as e:
             print(f"Error reading job file: {e}")
             return None
     
     def update_job_status(self, job_id: str, status: str, progress: int = None, status_message: str = None) -> bool:
         """Update job status, progress, and detailed status message."""
-        job = self.get_job(job_id)
-        if not job:
-            return False
-        
-        job["status"] = status
-        job["updated_at"] = datetime.now().isoformat()
-        
-        if progress is not None:
-            job["progress"] = progress
+        with self._lock:
+            job = self._cached_job(job_id)
+            if not job:
+                return False
             
-        if status_message is not None:
-            job["status_message"] = status_message
-        
-        self._save_job(job)
+            status_changed = job["status"] != status
+            job["status"] = status
+            job["updated_at"] = datetime.now().isoformat()
+            
+            if progress is not None:
+                job["progress"] = progress
+                
+            if status_message is not None:
+                job["status_message"] = status_message
+            
+            # Coalesce small progress steps; readers are served from memory anyway
+            last_progress = self._persisted_progress.get(job_id)
+            if status_changed or last_progress is None or job["progress"] - last_progress >= self.PROGRESS_PERSIST_STEP:
+                self._persisted_progress[job_id] = job["progress"]
+                self._append_wal(job)
         return True
     
     def complete_job(self, job_id: str, result: Dict[str, Any]) -> bool:
         """Mark job as completed with result data."""
-        job = self.get_job(job_id)
-        if not job:
-            return False
-        
         # Verify that required output files actually exist before marking as completed
-        if "output_path" in result:
-            if not os.path.exists(result["output_path"]):
-                error_msg = f"Output file not found: {result['output_path']}"
+        for key, label in (("output_path", "Output"), ("subtitle_path", "Subtitle")):
+            if key in result and not os.path.exists(result[key]):
+                error_msg = f"{label} file not found: {result[key]}"
                 print(f"Job {job_id} completion failed: {error_msg}")
                 return self.fail_job(job_id, error_msg)
-            job["output_path"] = result["output_path"]
         
-        if "subtitle_path" in result:
-            if not os.path.exists(result["subtitle_path"]):
-                error_msg = f"Subtitle file not found: {result['subtitle_path']}"
-                print(f"Job {job_id} completion failed: {error_msg}")
-                return self.fail_job(job_id, error_msg)
-            job["subtitle_path"] = result["subtitle_path"]
-        
-        # Only mark as completed if all files exist
-        job["status"] = "completed"
-        job["progress"] = 100
-        job["updated_at"] = datetime.now().isoformat()
-        
-        self._save_job(job)
+        # Only mark as completed if all files exist; the cached dict only changes under the lock
+        with self._lock:
+            job = self._cached_job(job_id)
+            if not job:
+                return False
+            
+            for key in ("output_path", "subtitle_path"):
+                if key in result:
+                    job[key] = result[key]
+            job["status"] = "completed"
+            job["progress"] = 100
+            job["updated_at"] = datetime.now().isoformat()
+            self._finish_job(job)
         return True
     
     def fail_job(self, job_id: str, error_message: str) -> bool:
         """Mark job as failed with error message."""
-        job = self.get_job(job_id)
-        if not job:
-            return False
-        
-        job["status"] = "failed"
-        job["error"] = error_message
-        job["updated_at"] = datetime.now().isoformat()
-        
-        self._save_job(job)
+        with self._lock:
+            job = self._cached_job(job_id)
+            if not job:
+                return False
+            
+            job["status"] = "failed"
+            job["error"] = error_message
+            job["updated_at"] = datetime.now().isoformat()
+            self._finish_job(job)
         return True
     
+    def fail_unfinished_jobs(self, error_message: str) -> int:
+        """Fail every job still queued or processing (e.g. on shutdown) and return how many."""
+        with self._lock:
+            job_ids = [job_id for job_id, job in self._jobs.items() if job["status"] not in TERMINAL_STATUSES]
+        return sum(self.fail_job(job_id, error_message) for job_id in job_ids)
+    
     def _save_job(self, job: Dict[str, Any]) -> None:
-        """Save job data to file."""
+        """Save job data to file (atomically, so readers never see a partial snapshot)."""
         job_file_path = self._get_job_file_path(job["job_id"])
+        tmp_path = f"{job_file_path}.tmp"
         
         try:
-            with open(job_file_path, 'w') as f:
+            with open(tmp_path, 'w') as f:
                 json.dump(job, f, indent=2)
+            os.replace(tmp_path, job_file_path)
         except Exception as e:
             print(f"Error saving job file: {e}")
     
@@ -162,7 +272,10 @@ class JobManager:
                 job_path = os.path.join(self.jobs_dir, job_file)
                 with open(job_path, 'r') as f:
                     job = json.load(f)
-                    jobs.append(job)
+                # Prefer the in-memory copy, which has progress not yet snapshotted
+                with self._lock:
+                    job = dict(self._jobs.get(job.get("job_id"), job))
+                jobs.append(job)
         
         except Exception as e:
             print(f"Error listing jobs: {e}")
@@ -183,6 +296,8 @@ class JobManager:
                     job_path = os.path.join(self.jobs_dir, job_file)
                     if os.path.getmtime(job_path) < cutoff_time:
                         os.remove(job_path)
+                        with self._lock:
+                            self._jobs.pop(job_file[:-len('.json')], None)
                         cleanup_count += 1
         
         except Exception as e:
@@ -17,6 +17,8 @@ class OptimizedSubtitleService:
         self.current_model = None
         self.current_model_name = None
         self.memory_threshold = 0.85  # 85% memory usage threshold
+        # Half precision only on GPU; Whisper falls back to FP32 on CPU anyway
+        self.fp16 = torch.cuda.is_available()
         
         # Model memory requirements (approximate)
         self.model_memory = {
@@ -62,10 +64,10 @@ class OptimizedSubtitleService:
         return "tiny"
     
     def _load_model_if_needed(self, model_name: str):
-        """Load Whisper model only if different from current model."""
+        """Load Whisper model only if different from current model, and return it."""
         if self.current_model_name == model_name and self.current_model is not None:
             logger.info(f"Model '{model_name}' already loaded")
-            return
+            return self.current_model
         
         # Unload current model to free memory
         if self.current_model is not None:
@@ -87,6 +89,17 @@ class OptimizedSubtitleService:
         logger.info(f"✅ Whisper model '{model_name}' loaded successfully! Used {memory_used:.1f}MB RAM")
         
         logger.info(f"Model '{model_name}' loaded successfully, using {memory_used:.0f}MB memory")
+        return self.current_model
+    
+    def preload_model(self):
+        """Load the default model and run one warmup pass so the first job skips the cold start."""
+        memory_info = self._get_memory_usage()
+        model = self._load_model_if_needed(self._select_optimal_model(memory_info["available_mb"]))
+        
+        # One second of silence is enough to initialise the encoder/decoder kernels
+        with torch.inference_mode():
+            model.transcribe(torch.zeros(whisper.audio.SAMPLE_RATE), language="en", fp16=self.fp16)
+        logger.info(f"Model '{self.current_model_name}' preloaded and warmed up")
     
     def _should_process_in_chunks(self, video_duration: float, available_memory_mb: float) -> bool:
         """Determine if audio should be processed in chunks."""
@@ -115,23 +128,23 @@ class OptimizedSubtitleService:
             # Select optimal model
             model_name = self._select_optimal_model(memory_info["available_mb"], video_duration)
             
-            # Load model if needed
-            self._load_model_if_needed(model_name)
+            # Load model if needed; the job keeps its own reference so unload_model can't pull it mid-transcription
+            model = self._load_model_if_needed(model_name)
             
             # Determine if chunked processing is needed
             if self._should_process_in_chunks(video_duration, memory_info["available_mb"]):
                 logger.info("Using chunked audio processing for large file")
-                return self._generate_subtitles_chunked(video_path, language, timing_offset, progress_callback)
+                return self._generate_subtitles_chunked(model, video_path, language, timing_offset, progress_callback)
             else:
                 logger.info("Using standard audio processing")
-                return self._generate_subtitles_standard(video_path, language, timing_offset, progress_callback)
+                return self._generate_subtitles_standard(model, video_path, language, timing_offset, progress_callback)
             
         except Exception as e:
             # Cleanup on error
             self._cleanup_memory()
             raise Exception(f"Error generating subtitles: {str(e)}")
     
-    def _generate_subtitles_standard(self, video_path: str, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
+    def _generate_subtitles_standard(self, model, video_path: str, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
         """Standard subtitle generation for smaller files."""
         
         logger.info("🎙️ Starting Whisper transcription (standard mode)")
@@ -143,13 +156,14 @@ class OptimizedSubtitleService:
             progress_callback(25, "🎙️ Starting Whisper transcription...")
         
         # Transcribe the audio
-        result = self.current_model.transcribe(
-            video_path,
-            language=language,
-            word_timestamps=True,
-            verbose=True,  # Enable verbose for progress visibility
-            fp16=False  # Use FP32 for better compatibility on limited hardware
-        )
+        with torch.inference_mode():
+            result = model.transcribe(
+                video_path,
+                language=language,
+                word_timestamps=True,
+                verbose=True,  # Enable verbose for progress visibility
+                fp16=self.fp16
+            )
         
         # Update progress: Whisper completed (55%)
         if progress_callback:
@@ -185,7 +199,7 @@ class OptimizedSubtitleService:
         
         return subtitles
     
-    def _generate_subtitles_chunked(self, video_path: str, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
+    def _generate_subtitles_chunked(self, model, video_path: str, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
         """Generate subtitles by processing audio in chunks."""
         
         video_duration = self._get_video_duration(video_path)
@@ -234,13 +248,14 @@ class OptimizedSubtitleService:
                 if progress_callback:
                     progress_callback(chunk_progress_base + 5, f"⏳ Whisper processing chunk {chunk_index + 1}...")
                 
-                chunk_result = self.current_model.transcribe(
-                    chunk_path,
-                    language=language,
-                    word_timestamps=True,
-                    verbose=True,  # Enable verbose for chunk progress
-                    fp16=False
-                )
+                with torch.inference_mode():
+                    chunk_result = model.transcribe(
+                        chunk_path,
+                        language=language,
+                        word_timestamps=True,
+                        verbose=True,  # Enable verbose for chunk progress
+                        fp16=self.fp16
+                    )
                 
                 segments_found = len(chunk_result.get("segments", []))
                 logger.info(f"✅ Chunk {chunk_index + 1} completed! Found {segments_found} segments")
@@ -415,19 +430,9 @@ class OptimizedSubtitleService:
     def format_text_for_video(self, text: str, max_words_per_line: int = 4) -> str:
         """Format subtitle text for video display with word wrapping."""
         words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            current_line.append(word)
-            if len(current_line) >= max_words_per_line:
-                lines.append(' '.join(current_line))
-                current_line = []
-        
-        if current_line:
-            lines.append(' '.join(current_line))
+        n = max(1, max_words_per_line)
         
-        return '\n'.join(lines)
+        return '\n'.join(' '.join(words[i:i + n]) for i in range(0, len(words), n))
     
     def analyze_timing_gaps(self, subtitles: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze subtitle timing for optimization opportunities."""
@@ -1,35 +1,32 @@
 import os
 import gc
 import psutil
-import math
 import tempfile
 import subprocess
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips, AudioFileClip
+import json
+from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips
 from typing import List, Dict, Any, Tuple
 import logging
 
+# Pillow is required for text rendering; fail once at import time
+try:
+    from PIL import Image
+except ImportError:
+    raise ImportError(
+        "Pillow (PIL) is required for text rendering in videos. "
+        "Install it with: pip install Pillow"
+    )
+
 # Configure logging for performance monitoring
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class OptimizedVideoService:
     def __init__(self):
-        self._verify_pil()
         self.memory_threshold = 0.85  # 85% memory usage triggers cleanup
         self.chunk_duration = 60  # Process videos in 60-second chunks for large files
         self.min_chunk_duration = 30  # Minimum chunk size
         
-    def _verify_pil(self):
-        """Verify that PIL/Pillow is available for text rendering."""
-        try:
-            from PIL import Image
-            return True
-        except ImportError:
-            raise ImportError(
-                "Pillow (PIL) is required for text rendering in videos. "
-                "Install it with: pip install Pillow"
-            )
-    
     def _get_memory_usage(self) -> float:
         """Get current memory usage percentage."""
         return psutil.virtual_memory().percent / 100.0
@@ -461,8 +458,31 @@ class OptimizedVideoService:
         return clips
     
     # Include optimized versions of other methods from the original VideoService
-    def split_video(self, video_path: str, start_time: float, end_time: float, output_path: str) -> str:
-        """Split video with memory optimization."""
+    def split_video(self, video_path: str, start_time: float, end_time: float, output_path: str,
+                    precise: bool = False) -> str:
+        """Split video with memory optimization (stream copy unless precise re-encoding is requested)."""
+        if not precise:
+            start_time = max(0, start_time)
+            if start_time >= end_time:
+                raise Exception("Error splitting video: Start time must be less than end time")
+            
+            # Stream copy is pure I/O: no decode, no encode, no MoviePy frame buffers
+            cmd = [
+                'ffmpeg', '-y',
+                '-ss', str(start_time),
+                '-i', video_path,
+                '-t', str(end_time - start_time),
+                '-c', 'copy',
+                '-avoid_negative_ts', 'make_zero',
+                '-loglevel', 'error',
+                output_path
+            ]
+            try:
+                subprocess.run(cmd, check=True, capture_output=True, text=True)
+                return output_path
+            except (OSError, subprocess.CalledProcessError) as e:
+                logger.warning(f"Stream-copy split failed ({e}), re-encoding with MoviePy")
+        
         try:
             video = VideoFileClip(video_path)
             
@@ -567,51 +587,52 @@ class OptimizedVideoService:
                           settings: Dict[str, Any]) -> str:
         """Add music with memory optimization."""
         try:
-            video = VideoFileClip(video_path)
-            music = AudioFileClip(music_path)
-            
             volume = settings.get("volume", 0.5)
             fade_in = settings.get("fade_in", 0)
             fade_out = settings.get("fade_out", 0)
             loop_music = settings.get("loop_music", False)
             
-            music = music.volumex(volume)
-            
-            if loop_music and music.duration < video.duration:
-                loops_needed = math.ceil(video.duration / music.duration)
-                # Instead of concatenating in memory, trim and loop more efficiently
-                if loops_needed > 1:
-                    music = music.loop(duration=video.duration)
-            
-            if music.duration > video.duration:
-                music = music.subclip(0, video.duration)
+            probe = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_streams', '-show_format', '-of', 'json', video_path],
+                capture_output=True, text=True, check=True
+            )
+            info = json.loads(probe.stdout)
+            video_duration = float(info["format"]["duration"])
+            has_audio = any(stream.get("codec_type") == "audio" for stream in info.get("streams", []))
             
+            # Volume and fades in one FFmpeg filter graph instead of MoviePy sample passes
+            music_filters = [f"volume={volume}"]
             if fade_in > 0:
-                music = music.fadein(fade_in)
+                music_filters.append(f"afade=t=in:st=0:d={fade_in}")
             if fade_out > 0:
-                music = music.fadeout(fade_out)
+                music_filters.append(f"afade=t=out:st={max(0.0, video_duration - fade_out)}:d={fade_out}")
+            filter_complex = f"[1:a]{','.join(music_filters)}[m]"
             
-            if video.audio is not None:
-                from moviepy.audio.fx import CompositeAudioClip
-                final_audio = CompositeAudioClip([video.audio, music])
+            if has_audio:
+                filter_complex += ";[0:a][m]amix=inputs=2:duration=first:normalize=0[a]"
+                audio_label = "[a]"
             else:
-                final_audio = music
+                audio_label = "[m]"
+            
+            cmd = ['ffmpeg', '-y', '-i', video_path]
+            if loop_music:
+                cmd += ['-stream_loop', '-1']
+            cmd += [
+                '-i', music_path,
+                '-filter_complex', filter_complex,
+                '-map', '0:v', '-map', audio_label,
+                '-c:v', 'copy',
+                '-c:a', 'aac',
+                '-t', str(video_duration),
+                output_path
+            ]
             
-            final_video = video.set_audio(final_audio)
+            logger.info(f"Mixing music with filter graph: {filter_complex}")
+            result = subprocess.run(cmd, capture_output=True, text=True)
             
-            final_video.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                preset='ultrafast',
-                verbose=False,
-                logger=None,
-                threads=1
-            )
+            if result.returncode != 0:
+                raise Exception(f"FFmpeg music mix failed: {result.stderr}")
             
-            video.close()
-            music.close()
-            final_video.close()
             self._cleanup_memory()
             
             return output_path
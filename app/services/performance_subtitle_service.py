@@ -7,8 +7,14 @@ import whisper
 import torch
 import gc
 import os
+import threading
+import math
+import shutil
+import itertools
+import subprocess
 import tempfile
 import concurrent.futures
+from moviepy.editor import VideoFileClip
 from typing import List, Dict, Any, Optional
 import psutil
 import time
@@ -17,15 +23,27 @@ from app.config.performance_config import PerformanceConfig
 import logging
 logger = logging.getLogger(__name__)
 
+# RAM-backed scratch space for extracted audio chunks (Linux tmpfs)
+SHM_DIR = "/dev/shm"
+# 16kHz mono 16-bit PCM, matching the ffmpeg chunk extraction settings
+PCM_BYTES_PER_SECOND = 16000 * 2
+
 class PerformanceSubtitleService:
     """High-performance subtitle service using all available system resources."""
     
     def __init__(self):
         self.config = PerformanceConfig()
-        self.config.optimize_pytorch()
+        
+        # Split cores between parallel chunk workers so ffmpeg and BLAS don't oversubscribe;
+        # torch is already imported, so its intra-op pool must be capped with set_num_threads
+        video_config = self.config.get_video_processing_config()
+        self.threads_per_chunk = max(1, self.config.system_info["total_cpu_cores"] // video_config["parallel_chunks"])
+        self.config.optimize_pytorch(self.threads_per_chunk)
         
         self.current_model = None
         self.current_model_name = None
+        # Guards model load/unload so concurrent requests don't load the model twice
+        self._model_lock = threading.Lock()
         
         # Print performance info
         self.config.print_performance_info()
@@ -50,16 +68,16 @@ class PerformanceSubtitleService:
             
             if video_duration > 600:  # 10+ minute videos
                 logger.info("🔥 Using parallel chunked processing for maximum speed")
-                return self._generate_subtitles_parallel(video_path, language, timing_offset, progress_callback)
+                return self._generate_subtitles_parallel(video_path, video_duration, language, timing_offset, progress_callback)
             else:
                 logger.info("⚡ Using optimized single-pass processing")
-                return self._generate_subtitles_optimized(video_path, language, timing_offset, progress_callback)
+                return self._generate_subtitles_optimized(video_path, video_duration, language, timing_offset, progress_callback)
                 
         except Exception as e:
             self._cleanup_memory()
             raise Exception(f"High-performance subtitle generation failed: {str(e)}")
     
-    def _generate_subtitles_optimized(self, video_path: str, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
+    def _generate_subtitles_optimized(self, video_path: str, video_duration: float, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
         """Optimized single-pass processing with all resources."""
         
         whisper_config = self.config.get_whisper_config()
@@ -89,7 +107,7 @@ class PerformanceSubtitleService:
         segments_found = len(result.get("segments", []))
         
         logger.info(f"✅ Transcription completed in {processing_time:.1f}s! Found {segments_found} segments")
-        logger.info(f"📊 Processing speed: {self._get_video_duration(video_path)/processing_time:.2f}x realtime")
+        logger.info(f"📊 Processing speed: {video_duration/processing_time:.2f}x realtime")
         
         if progress_callback:
             progress_callback(60, f"✅ Transcription completed! {segments_found} segments in {processing_time:.1f}s")
@@ -97,10 +115,9 @@ class PerformanceSubtitleService:
         # Process segments with word-level timing
         return self._process_segments(result["segments"], timing_offset)
     
-    def _generate_subtitles_parallel(self, video_path: str, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
+    def _generate_subtitles_parallel(self, video_path: str, video_duration: float, language: str, timing_offset: float, progress_callback=None) -> List[Dict[str, Any]]:
         """Parallel processing for large videos using all CPU cores."""
         
-        video_duration = self._get_video_duration(video_path)
         video_config = self.config.get_video_processing_config()
         chunk_duration = video_config["chunk_size_minutes"] * 60
         parallel_chunks = video_config["parallel_chunks"]
@@ -114,7 +131,9 @@ class PerformanceSubtitleService:
         current_time = 0
         chunk_index = 0
         
-        temp_dir = tempfile.mkdtemp(prefix="parallel_audio_")
+        chunk_count = math.ceil(video_duration / chunk_duration) if chunk_duration else 0
+        chunk_bytes = int(chunk_duration * PCM_BYTES_PER_SECOND)
+        temp_dir = tempfile.mkdtemp(prefix="parallel_audio_", dir=self._get_audio_temp_root(chunk_count * chunk_bytes))
         
         try:
             # Extract all audio chunks first
@@ -139,8 +158,8 @@ class PerformanceSubtitleService:
             if progress_callback:
                 progress_callback(30, f"📦 Created {total_chunks} chunks for parallel processing")
             
-            # Process chunks in parallel
-            all_subtitles = []
+            # Process chunks in parallel, collecting results per chunk index
+            per_chunk_results: List[Optional[List[Dict]]] = [None] * total_chunks
             
             with concurrent.futures.ThreadPoolExecutor(max_workers=parallel_chunks) as executor:
                 # Submit all chunks for processing
@@ -166,7 +185,7 @@ class PerformanceSubtitleService:
                                 word["start"] += chunk["start"] + timing_offset
                                 word["end"] += chunk["start"] + timing_offset
                         
-                        all_subtitles.extend(chunk_subtitles)
+                        per_chunk_results[chunk["index"]] = chunk_subtitles
                         completed += 1
                         
                         progress = 30 + int((completed / total_chunks) * 35)
@@ -178,8 +197,8 @@ class PerformanceSubtitleService:
                     except Exception as e:
                         logger.error(f"❌ Chunk {chunk['index']+1} failed: {e}")
             
-            # Sort by start time
-            all_subtitles.sort(key=lambda x: x["start"])
+            # Chunks are disjoint and already time-ordered, so concatenating by index keeps start order
+            all_subtitles = list(itertools.chain.from_iterable(r for r in per_chunk_results if r))
             
             logger.info(f"🎉 Parallel processing completed! Total segments: {len(all_subtitles)}")
             
@@ -190,7 +209,6 @@ class PerformanceSubtitleService:
             
         finally:
             # Cleanup temporary directory
-            import shutil
             shutil.rmtree(temp_dir, ignore_errors=True)
     
     def _process_chunk_parallel(self, chunk: Dict, language: str) -> List[Dict[str, Any]]:
@@ -247,46 +265,70 @@ class PerformanceSubtitleService:
     
     def _load_model_if_needed(self, model_name: str):
         """Load Whisper model optimized for high performance."""
+        # Fast path without taking the lock
         if self.current_model_name == model_name and self.current_model is not None:
             logger.info(f"🎯 Model '{model_name}' already loaded")
             return
         
-        # Unload current model
-        if self.current_model is not None:
-            logger.info(f"🔄 Unloading current model '{self.current_model_name}'")
-            del self.current_model
-            torch.cuda.empty_cache() if torch.cuda.is_available() else None
-            gc.collect()
-        
-        # Load new model with performance optimizations
-        logger.info(f"🚀 Loading Whisper model '{model_name}' (high-performance mode)")
-        
-        memory_before = psutil.virtual_memory().used / (1024**3)
-        
-        # Load with device optimization
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.current_model = whisper.load_model(model_name, device=device)
-        self.current_model_name = model_name
-        
-        memory_after = psutil.virtual_memory().used / (1024**3)
-        memory_used = memory_after - memory_before
-        
-        logger.info(f"✅ Model '{model_name}' loaded! Used {memory_used:.1f}GB RAM")
+        with self._model_lock:
+            # Another thread may have loaded it while we waited for the lock
+            if self.current_model_name == model_name and self.current_model is not None:
+                logger.info(f"🎯 Model '{model_name}' already loaded")
+                return
+            
+            # Unload current model
+            if self.current_model is not None:
+                logger.info(f"🔄 Unloading current model '{self.current_model_name}'")
+                del self.current_model
+                self.current_model = None
+                torch.cuda.empty_cache() if torch.cuda.is_available() else None
+                gc.collect()
+            
+            # Load new model with performance optimizations
+            logger.info(f"🚀 Loading Whisper model '{model_name}' (high-performance mode)")
+            
+            memory_before = psutil.virtual_memory().used / (1024**3)
+            
+            # Load with device optimization
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            model = whisper.load_model(model_name, device=device)
+            self.current_model_name = model_name
+            self.current_model = model
+            
+            memory_after = psutil.virtual_memory().used / (1024**3)
+            memory_used = memory_after - memory_before
+            
+            logger.info(f"✅ Model '{model_name}' loaded! Used {memory_used:.1f}GB RAM")
         
     def _get_video_duration(self, video_path: str) -> float:
         """Get video duration in seconds."""
-        import moviepy.editor as mp
         try:
-            with mp.VideoFileClip(video_path) as video:
+            with VideoFileClip(video_path) as video:
                 return video.duration
         except Exception as e:
             logger.error(f"Error getting video duration: {e}")
             return 0.0
     
+    def _get_audio_temp_root(self, required_bytes: int) -> Optional[str]:
+        """Use /dev/shm for audio chunks when writable and large enough, else the default temp dir."""
+        if not (os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK)):
+            return None
+        
+        try:
+            shm_free = shutil.disk_usage(SHM_DIR).free
+        except OSError:
+            return None
+        
+        # Never take more than half of shared memory
+        if required_bytes > shm_free / 2:
+            logger.info(f"💾 Audio chunks need {required_bytes/(1024**2):.0f}MB, too large for {SHM_DIR} - using disk")
+            return None
+        
+        logger.info(f"⚡ Using {SHM_DIR} for audio chunks ({required_bytes/(1024**2):.0f}MB)")
+        return SHM_DIR
+    
     def _extract_audio_chunk(self, video_path: str, output_path: str, start_time: float, end_time: float):
         """Extract audio chunk using FFmpeg with performance optimizations."""
-        import subprocess
-        
         ffmpeg_cmd = [
             "ffmpeg", "-y",
             "-ss", str(start_time),
@@ -296,7 +338,7 @@ class PerformanceSubtitleService:
             "-acodec", "pcm_s16le",
             "-ar", "16000",  # 16kHz for Whisper
             "-ac", "1",  # Mono
-            "-threads", str(self.config.system_info["total_cpu_cores"]),
+            "-threads", str(self.threads_per_chunk),
             "-loglevel", "quiet",
             output_path
         ]
@@ -307,10 +349,11 @@ class PerformanceSubtitleService:
         """Emergency memory cleanup."""
         logger.info("🧹 Performing memory cleanup")
         
-        if self.current_model is not None:
-            del self.current_model
-            self.current_model = None
-            self.current_model_name = None
+        with self._model_lock:
+            if self.current_model is not None:
+                del self.current_model
+                self.current_model = None
+                self.current_model_name = None
         
         torch.cuda.empty_cache() if torch.cuda.is_available() else None
         gc.collect()
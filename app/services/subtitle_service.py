@@ -153,19 +153,9 @@ class SubtitleService:
             Formatted text with line breaks
         """
         words = text.split()
-        lines = []
-        current_line = []
+        n = max(1, max_words_per_line)
         
-        for word in words:
-            current_line.append(word)
-            if len(current_line) >= max_words_per_line:
-                lines.append(' '.join(current_line))
-                current_line = []
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return '\n'.join(lines)
+        return '\n'.join(' '.join(words[i:i + n]) for i in range(0, len(words), n))
     
     def analyze_timing_gaps(self, subtitles: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
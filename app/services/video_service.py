@@ -1,23 +1,100 @@
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips, AudioFileClip
+from moviepy.editor import VideoFileClip, VideoClip, ImageClip, TextClip, CompositeVideoClip, concatenate_videoclips
+from moviepy.config import get_setting
+import numpy as np
 import os
-from typing import List, Dict, Any, Tuple
-import math
+import re
+import bisect
+import itertools
+import json
+import subprocess
+import tempfile
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Optional
 
-class VideoService:
-    def __init__(self):
-        # PIL/Pillow verification - check if it's available for text rendering
-        self._verify_pil()
+# Pillow is required for text rendering; fail once at import time
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    raise ImportError(
+        "Pillow (PIL) is required for text rendering in videos. "
+        "Install it with: pip install Pillow"
+    )
+
+# Cap encoder threads so libx264 doesn't starve the MoviePy frame producer on large hosts
+ENCODER_THREADS = min(os.cpu_count() or 4, 4)
+X264_FFMPEG_PARAMS = ["-x264opts", f"sliced-threads=0:threads={ENCODER_THREADS}", "-thread_type", "frame"]
+
+# Hardware H.264 encoders in order of preference; libx264 is the fallback
+HW_H264_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_videotoolbox")
+NVENC_FFMPEG_PARAMS = ["-preset", "p4", "-rc", "vbr"]
+
+# Sentence-level jobs up to this many segments are burned with chained drawtext filters
+DRAWTEXT_MAX_SUBTITLES = 64
+
+# Font files for the ImageMagick font names used in settings (drawtext and Pillow need paths)
+FONT_FILES = {
+    "DejaVu-Sans-Bold": "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "Luckiest Guy": "/usr/share/fonts/truetype/luckiest-guy/LuckiestGuy-Regular.ttf",
+}
+
+# ASS numpad alignment (\an) anchoring text by its top edge
+ASS_TOP_ALIGNMENT = {"left": 7, "center": 8, "right": 9}
+
+
+@lru_cache(maxsize=None)
+def _pick_h264_encoder(ffmpeg_binary: str = "ffmpeg") -> str:
+    """Pick the fastest H.264 encoder that actually works on this host (probed once per binary)."""
+    try:
+        listed = subprocess.run(
+            [ffmpeg_binary, "-hide_banner", "-encoders"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return "libx264"
     
-    def _verify_pil(self):
-        """Verify that PIL/Pillow is available for text rendering."""
+    for encoder in HW_H264_ENCODERS:
+        if encoder not in listed:
+            continue
+        # Builds often list NVENC/QSV without the hardware present, so try a one-frame encode
         try:
-            from PIL import Image
-            return True
-        except ImportError:
-            raise ImportError(
-                "Pillow (PIL) is required for text rendering in videos. "
-                "Install it with: pip install Pillow"
+            trial = subprocess.run(
+                [ffmpeg_binary, "-hide_banner", "-loglevel", "error",
+                 "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+                 "-frames:v", "1", "-c:v", encoder, "-f", "null", "-"],
+                capture_output=True, timeout=20
             )
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if trial.returncode == 0:
+            print(f"🚀 Using hardware H.264 encoder: {encoder}")
+            return encoder
+    
+    return "libx264"
+
+
+def _h264_ffmpeg_params(encoder: str) -> List[str]:
+    """Encoder-specific FFmpeg options to go with _pick_h264_encoder()."""
+    if encoder == "libx264":
+        return X264_FFMPEG_PARAMS
+    if encoder == "h264_nvenc":
+        return NVENC_FFMPEG_PARAMS
+    return []
+
+
+@lru_cache(maxsize=32)
+def _load_font(font: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
+    """Load a TrueType font by path, settings name or file name; None if it can't be resolved."""
+    for candidate in (FONT_FILES.get(font, font), font.replace("-", "") + ".ttf"):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return None
+
+class VideoService:
+    def __init__(self):
+        # Rasterized text clips keyed by (text, fontsize, font, color, stroke_color, stroke_width, method)
+        self._text_cache: Dict[tuple, ImageClip] = {}
     
     def add_subtitles_to_video(self, video_path: str, subtitles: List[Dict[str, Any]], 
                              output_path: str, settings: Dict[str, Any], word_level_mode: str = "off") -> str:
@@ -34,6 +111,18 @@ class VideoService:
         Returns:
             Path to the output video
         """
+        if word_level_mode == "off" and len(subtitles) <= DRAWTEXT_MAX_SUBTITLES:
+            try:
+                return self._render_with_drawtext(video_path, subtitles, output_path, settings)
+            except Exception as e:
+                print(f"⚠️ FFmpeg drawtext rendering failed ({e}), trying libass")
+        
+        try:
+            return self._render_with_ffmpeg(video_path, subtitles, output_path, settings, word_level_mode)
+        except Exception as e:
+            # FFmpeg missing, built without libass, or unreadable input - fall back to MoviePy compositing
+            print(f"⚠️ FFmpeg subtitle rendering unavailable ({e}), falling back to MoviePy")
+        
         try:
             # Load the video
             video = VideoFileClip(video_path)
@@ -42,22 +131,26 @@ class VideoService:
             subtitle_clips = []
             
             print(f"🎬 Video processing mode: '{word_level_mode}'")
+            print(f"🎨 Subtitle color: {self._ass_text_color(settings)} (line-color: {settings.get('line-color')}, "
+                  f"normal-color: {settings.get('normal-color')})")
+            
+            # Position is the same for every clip in the job
+            position = self._resolve_position(video.size, settings)
             
             if word_level_mode == "off":
                 # Traditional sentence-level subtitles
+                max_words = settings.get("max-words-per-line", 4)
+                formatted = {}
                 for subtitle in subtitles:
-                    # Format text for display
-                    from app.services.subtitle_service import SubtitleService
-                    subtitle_service = SubtitleService()
-                    formatted_text = subtitle_service.format_text_for_video(
-                        subtitle["text"], 
-                        settings.get("max-words-per-line", 4)
-                    )
+                    # Format text for display, once per distinct line
+                    text = subtitle["text"]
+                    if text not in formatted:
+                        formatted[text] = self._format_text_for_video(text, max_words)
                     
                     # Create text clip with styling
                     txt_clip = self._create_styled_text_clip(
-                        formatted_text,
-                        video.size,
+                        formatted[text],
+                        position,
                         settings,
                         duration=subtitle["end"] - subtitle["start"]
                     ).set_start(subtitle["start"])
@@ -66,31 +159,34 @@ class VideoService:
             
             elif word_level_mode == "karaoke":
                 # Karaoke-style word highlighting
-                subtitle_clips.extend(self._create_karaoke_clips(subtitles, video.size, settings))
+                subtitle_clips.extend(self._create_karaoke_clips(subtitles, position, settings))
                 
             elif word_level_mode == "popup":
                 # Pop-up individual words
-                subtitle_clips.extend(self._create_popup_word_clips(subtitles, video.size, settings))
+                subtitle_clips.extend(self._create_popup_word_clips(subtitles, position, settings))
                 
             elif word_level_mode == "typewriter":
                 # Typewriter accumulating words
-                subtitle_clips.extend(self._create_typewriter_clips(subtitles, video.size, settings))
+                subtitle_clips.extend(self._create_typewriter_clips(subtitles, position, video.size, settings))
             
-            # Composite video with subtitles
+            # Composite video with a single flattened subtitle track
             if subtitle_clips:
-                final_video = CompositeVideoClip([video] + subtitle_clips)
+                final_video = CompositeVideoClip([video, self._flatten_subtitle_clips(subtitle_clips, video.size, video.duration)])
             else:
                 final_video = video
             
             # Write output video
+            encoder = self._moviepy_encoder()
             final_video.write_videofile(
                 output_path,
-                codec='libx264',
+                codec=encoder,
                 audio_codec='aac',
                 temp_audiofile='temp-audio.m4a',
                 remove_temp=True,
                 verbose=False,
-                logger=None
+                logger=None,
+                threads=ENCODER_THREADS,
+                ffmpeg_params=_h264_ffmpeg_params(encoder)
             )
             
             # Clean up
@@ -103,83 +199,524 @@ class VideoService:
             
         except Exception as e:
             raise Exception(f"Error adding subtitles to video: {str(e)}")
+        
+        finally:
+            self._text_cache.clear()
     
-    def _create_styled_text_clip(self, text: str, video_size: Tuple[int, int], 
-                               settings: Dict[str, Any], duration: float) -> TextClip:
-        """Create a styled text clip based on settings."""
-        
-        # Position mapping
-        position_map = {
-            "top-left": ("left", "top"),
-            "top-center": ("center", "top"), 
-            "top-right": ("right", "top"),
-            "center-left": ("left", "center"),
-            "center-center": ("center", "center"),
-            "center-right": ("right", "center"),
-            "bottom-left": ("left", "bottom"),
-            "bottom-center": ("center", "bottom"),
-            "bottom-right": ("right", "bottom")
+    def _flatten_subtitle_clips(self, clips: List, video_size: Tuple[int, int], duration: float) -> VideoClip:
+        """
+        Flatten positioned text clips into one RGBA overlay track.
+        
+        Each distinct bitmap is stored once as uint8 RGBA (clips sharing a cached text
+        render share it); per frame only the clips active at t are converted to float
+        and blended, so the final composite blends a single overlay instead of N.
+        """
+        width, height = video_size
+        bitmaps = {}  # (id of frame, id of mask frame) -> (frame, mask frame, uint8 RGBA bitmap)
+        overlays = []
+        
+        for clip in clips:
+            rgb = clip.get_frame(0)
+            alpha = clip.mask.get_frame(0) if clip.mask is not None else None
+            key = (id(rgb), id(alpha))
+            if key not in bitmaps:
+                rgba = np.empty(rgb.shape[:2] + (4,), np.uint8)
+                rgba[:, :, :3] = rgb
+                rgba[:, :, 3] = 255 if alpha is None else np.rint(alpha * 255)
+                # Keep the source arrays referenced so their ids can't be reused by new arrays
+                bitmaps[key] = (rgb, alpha, rgba)
+            rgba = bitmaps[key][2]
+            
+            h, w = rgba.shape[:2]
+            x, y = self._resolve_clip_position(clip.pos(0), (w, h), video_size)
+            
+            # Clip the bitmap to the frame bounds (a view, no copy)
+            x0, y0 = max(0, x), max(0, y)
+            x1, y1 = min(width, x + w), min(height, y + h)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            
+            overlays.append((
+                clip.start,
+                clip.end if clip.end is not None else duration,
+                (slice(y0, y1), slice(x0, x1)),
+                rgba[y0 - y:y1 - y, x0 - x:x1 - x]
+            ))
+        
+        # Interval index: overlays sorted by start with a running max of end times, so the
+        # active window is found by bisection (O(log n + active)) instead of scanning every clip
+        order = sorted(range(len(overlays)), key=lambda i: overlays[i][0])
+        starts = [overlays[i][0] for i in order]
+        reach = list(itertools.accumulate((overlays[i][1] for i in order), max))
+        
+        last = {"t": None, "rgb": None, "mask": None}
+        
+        def render(t):
+            if last["t"] != t:
+                track = np.zeros((height, width, 3), np.float32)
+                mask = np.zeros((height, width, 1), np.float32)
+                # Everything before lo has ended by t; nothing from hi on has started
+                lo, hi = bisect.bisect_right(reach, t), bisect.bisect_right(starts, t)
+                # Blend in the original clip order
+                for i in sorted(i for i in order[lo:hi] if t < overlays[i][1]):
+                    _, _, target, rgba = overlays[i]
+                    alpha = rgba[:, :, 3:].astype(np.float32) * (1 / 255)
+                    track[target] = alpha * rgba[:, :, :3] + (1 - alpha) * track[target]
+                    mask[target] = alpha + (1 - alpha) * mask[target]
+                last.update(t=t, rgb=track.astype(np.uint8), mask=mask[:, :, 0])
+            return last
+        
+        track_clip = VideoClip(make_frame=lambda t: render(t)["rgb"], duration=duration)
+        track_clip.mask = VideoClip(make_frame=lambda t: render(t)["mask"], ismask=True, duration=duration)
+        return track_clip
+    
+    def _resolve_clip_position(self, pos, clip_size: Tuple[int, int], video_size: Tuple[int, int]) -> Tuple[int, int]:
+        """Resolve MoviePy keyword positions ('center', 'left', ...) to pixel coordinates."""
+        keywords = {
+            "left": 0, "top": 0,
+            "center": None,
+            "right": video_size[0] - clip_size[0],
+            "bottom": video_size[1] - clip_size[1]
         }
+        resolved = []
+        for axis, value in enumerate(pos):
+            if isinstance(value, str):
+                offset = keywords.get(value)
+                value = (video_size[axis] - clip_size[axis]) // 2 if offset is None else offset
+            resolved.append(int(value))
+        return resolved[0], resolved[1]
+    
+    def _render_with_ffmpeg(self, video_path: str, subtitles: List[Dict[str, Any]],
+                            output_path: str, settings: Dict[str, Any], word_level_mode: str) -> str:
+        """Burn subtitles in a single FFmpeg pass using a generated ASS file."""
+        print(f"🎬 Video processing mode: '{word_level_mode}' (FFmpeg/libass)")
+        
+        video_size = self._probe_video_size(video_path)
+        ass_file = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', suffix='.ass', delete=False)
+        
+        try:
+            ass_file.write(self._subtitles_to_ass(subtitles, video_size, settings, word_level_mode))
+            ass_file.close()
+            
+            encoder = _pick_h264_encoder()
+            cmd = [
+                "ffmpeg", "-y",
+                "-i", video_path,
+                "-vf", f"ass={self._escape_filter_path(ass_file.name)}",
+                "-c:v", encoder, *_h264_ffmpeg_params(encoder),
+                "-threads", str(ENCODER_THREADS),
+                "-c:a", "copy",
+                "-loglevel", "error",
+                output_path
+            ]
+            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            
+            return output_path
+            
+        finally:
+            os.unlink(ass_file.name)
+    
+    def _render_with_drawtext(self, video_path: str, subtitles: List[Dict[str, Any]],
+                              output_path: str, settings: Dict[str, Any]) -> str:
+        """Burn sentence-level subtitles in a single FFmpeg pass with one drawtext filter per segment."""
+        print("🎬 Video processing mode: 'off' (FFmpeg/drawtext)")
+        
+        video_size = self._probe_video_size(video_path)
+        
+        font_requested = settings.get("font-family", "DejaVu-Sans-Bold")
+        font_file = FONT_FILES.get(font_requested, font_requested)
+        font_option = "fontfile" if os.path.isfile(font_file) else "font"
+        font_value = font_file if font_option == "fontfile" else font_requested
+        
+        alignment, x, y = self._ass_position(video_size, settings.get("position", "center-center"))
+        # Left/center/right anchoring, same as the ASS \an7/8/9 layout
+        x_expr = {7: str(x), 8: "(w-text_w)/2", 9: f"{x}-text_w"}[alignment]
+        
+        style = (
+            f"{font_option}={self._escape_filter_value(font_value)}"
+            f":fontsize={settings.get('font-size', 100)}"
+            f":fontcolor=#{self._ass_text_color(settings).lstrip('#')}"
+            f":bordercolor=#{settings.get('outline-color', '#000000').lstrip('#')}"
+            f":borderw={settings.get('outline-width', 3)}"
+            f":x={x_expr}:y={y}:expansion=none"
+        )
+        
+        max_words = settings.get("max-words-per-line", 4)
+        filters = []
+        for subtitle in subtitles:
+            text = self._format_text_for_video(subtitle["text"], max_words)
+            filters.append(
+                f"drawtext={style}:text={self._escape_filter_value(text)}"
+                f":enable='between(t,{subtitle['start']:.3f},{subtitle['end']:.3f})'"
+            )
+        
+        encoder = _pick_h264_encoder()
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video_path,
+            "-vf", ",".join(filters) or "null",
+            "-c:v", encoder, *_h264_ffmpeg_params(encoder),
+            "-threads", str(ENCODER_THREADS),
+            "-c:a", "copy",
+            "-loglevel", "error",
+            output_path
+        ]
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        
+        return output_path
+    
+    def _escape_filter_value(self, value: str) -> str:
+        """Quote an arbitrary string as a filter option value inside a filtergraph."""
+        # Option level: single-quote, closing the quote around literal apostrophes
+        quoted = "'" + value.replace("'", "'\\''") + "'"
+        # Filtergraph level: escape the characters the graph parser treats specially
+        return re.sub(r"([\\'\[\],;])", r"\\\1", quoted)
+    
+    def _moviepy_encoder(self) -> str:
+        """H.264 encoder for write_videofile, probed against MoviePy's own FFmpeg binary."""
+        return _pick_h264_encoder(get_setting("FFMPEG_BINARY"))
+    
+    def _probe(self, video_path: str) -> Dict[str, Any]:
+        """Read format and stream metadata for a media file with ffprobe."""
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_streams", "-show_format", "-of", "json", video_path],
+            check=True, capture_output=True, text=True
+        )
+        return json.loads(result.stdout)
+    
+    def _probe_streams(self, video_path: str) -> List[Dict[str, Any]]:
+        """Read stream metadata for a media file with ffprobe."""
+        return self._probe(video_path).get("streams", [])
+    
+    def _probe_video_size(self, video_path: str) -> Tuple[int, int]:
+        """Read the first video stream's width and height with ffprobe."""
+        stream = next(s for s in self._probe_streams(video_path) if s.get("codec_type") == "video")
+        return int(stream["width"]), int(stream["height"])
+    
+    def _parse_frame_rate(self, rate: str) -> float:
+        """Convert an ffprobe rational frame rate ("30000/1001") to fps; 0.0 if unknown."""
+        numerator, _, denominator = (rate or "0/1").partition("/")
+        try:
+            return float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            return 0.0
+    
+    def _stream_signature(self, video_path: str) -> tuple:
+        """Codec parameters that must match for a stream-copy concat."""
+        return tuple(
+            (
+                stream.get("codec_type"),
+                stream.get("codec_name"),
+                stream.get("width"),
+                stream.get("height"),
+                stream.get("pix_fmt"),
+                stream.get("sample_rate"),
+                stream.get("channels")
+            )
+            for stream in self._probe_streams(video_path)
+            if stream.get("codec_type") in ("video", "audio")
+        )
+    
+    def _join_videos_concat_copy(self, video_paths: List[str], output_path: str) -> bool:
+        """
+        Join videos with FFmpeg's concat demuxer without re-encoding.
+        
+        Returns:
+            True if the inputs were compatible and the join succeeded, False otherwise
+        """
+        try:
+            signatures = {self._stream_signature(path) for path in video_paths}
+        except Exception as e:
+            print(f"⚠️ Could not probe inputs for stream-copy join: {e}")
+            return False
+        
+        if len(signatures) != 1:
+            print("🔀 Input videos have different codec parameters, re-encoding join")
+            return False
+        
+        list_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.txt')
+        
+        try:
+            for path in video_paths:
+                escaped_path = os.path.abspath(path).replace("'", "'\\''")
+                list_file.write(f"file '{escaped_path}'\n")
+            list_file.close()
+            
+            cmd = [
+                "ffmpeg", "-y",
+                "-f", "concat", "-safe", "0",
+                "-i", list_file.name,
+                "-c", "copy",
+                "-loglevel", "error",
+                output_path
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            
+            if result.returncode != 0:
+                print(f"⚠️ Stream-copy join failed, re-encoding: {result.stderr.strip()}")
+                return False
+            
+            print(f"⚡ Joined {len(video_paths)} videos with stream copy")
+            return True
+            
+        finally:
+            os.unlink(list_file.name)
+    
+    def _escape_filter_path(self, path: str) -> str:
+        """Escape a file path for use as an FFmpeg filter option value."""
+        return path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    
+    def _subtitles_to_ass(self, subtitles: List[Dict[str, Any]], video_size: Tuple[int, int],
+                          settings: Dict[str, Any], word_level_mode: str) -> str:
+        """Serialize subtitles and styling settings to an ASS script."""
+        width, height = video_size
+        
+        font_name = settings.get("font-family", "DejaVu-Sans-Bold")
+        bold = 0
+        if font_name == "DejaVu-Sans-Bold":
+            # ImageMagick font name -> fontconfig family
+            font_name, bold = "DejaVu Sans", -1
+        
+        text_color = self._hex_to_ass_color(self._ass_text_color(settings))
+        outline_color = self._hex_to_ass_color(settings.get("outline-color", "#000000"))
+        
+        alignment, pos_x, pos_y = self._ass_position(video_size, settings.get("position", "center-center"))
+        position_tag = f"{{\\an{alignment}\\pos({pos_x},{pos_y})}}"
+        
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "WrapStyle: 2",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            f"Style: Default,{font_name},{settings.get('font-size', 100)},{text_color},{text_color},{outline_color},"
+            f"&H00000000,{bold},0,0,0,100,100,0,0,1,{settings.get('outline-width', 3)},0,{alignment},50,50,50,1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+        ]
+        
+        if word_level_mode == "karaoke":
+            lines.extend(self._subtitles_to_ass_karaoke(subtitles, settings, position_tag))
+            return "\n".join(lines) + "\n"
+        
+        max_words = settings.get("max-words-per-line", 4)
         
-        position = settings.get("position", "center-center")
-        h_align, v_align = position_map.get(position, ("center", "center"))
+        for subtitle in subtitles:
+            words = subtitle.get("words") or []
+            
+            if word_level_mode == "off":
+                lines.append(self._ass_dialogue(subtitle["start"], subtitle["end"],
+                                                position_tag + self._wrap_ass_text(subtitle["text"], max_words)))
+            
+            elif word_level_mode == "popup":
+                for word in words:
+                    lines.append(self._ass_dialogue(word["start"], word["end"],
+                                                    position_tag + self._escape_ass_text(word["word"].strip())))
+            
+            elif word_level_mode == "typewriter":
+                prefix = []
+                for word in words:
+                    prefix.append(word["word"].strip())
+                    lines.append(self._ass_dialogue(word["start"], word["end"],
+                                                    position_tag + self._escape_ass_text(" ".join(prefix))))
+        
+        return "\n".join(lines) + "\n"
+    
+    def _subtitles_to_ass_karaoke(self, subtitles: List[Dict[str, Any]], settings: Dict[str, Any],
+                                  position_tag: str = "") -> List[str]:
+        """
+        Build karaoke Dialogue lines: one line per segment with a {\\k} tag per word.
+        
+        libass switches each word from the secondary colour (\\2c, not yet spoken) to the
+        primary colour (\\1c, spoken) when its centisecond count elapses.
+        """
+        normal_color = self._hex_to_ass_color(self._ass_text_color(settings))
+        highlight_color = self._hex_to_ass_color(settings.get("highlight-color") or self._ass_text_color(settings))
+        color_tag = f"{{\\1c{highlight_color}&\\2c{normal_color}&}}"
+        max_words = settings.get("max-words-per-line", 4)
+        
+        events = []
+        for subtitle in subtitles:
+            words = subtitle.get("words") or []
+            
+            if not words:
+                # Fallback to sentence-level subtitle for this segment
+                events.append(self._ass_dialogue(subtitle["start"], subtitle["end"],
+                                                 position_tag + self._wrap_ass_text(subtitle["text"], max_words)))
+                continue
+            
+            syllables = []
+            cursor = subtitle["start"]
+            for word in words:
+                # Silence before a word becomes an empty syllable so highlights stay in sync
+                gap_cs = int(round(max(0.0, word["start"] - cursor) * 100))
+                if gap_cs:
+                    syllables.append(f"{{\\k{gap_cs}}}")
+                word_cs = int(round(max(0.0, word["end"] - max(cursor, word["start"])) * 100))
+                syllables.append(f"{{\\k{word_cs}}}{self._escape_ass_text(word['word'].strip())} ")
+                cursor = max(cursor, word["end"])
+            
+            events.append(self._ass_dialogue(subtitle["start"], max(subtitle["end"], cursor),
+                                             position_tag + color_tag + "".join(syllables).rstrip()))
+        
+        return events
+    
+    def _ass_dialogue(self, start: float, end: float, text: str) -> str:
+        """Format a single ASS Dialogue event on the Default style."""
+        return (
+            f"Dialogue: 0,{self._seconds_to_ass_time(start)},{self._seconds_to_ass_time(end)},"
+            f"Default,,0,0,0,,{text}"
+        )
+    
+    def _ass_text_color(self, settings: Dict[str, Any]) -> str:
+        """Resolve the subtitle text colour (line-color, then normal-color)."""
+        return settings.get("line-color") or settings.get("normal-color", "#FFFFFF")
+    
+    def _ass_position(self, video_size: Tuple[int, int], position: str) -> Tuple[int, int, int]:
+        """Map a position setting to an ASS alignment and anchor point (matches the MoviePy layout)."""
+        width, height = video_size
+        v_align, _, h_align = position.partition("-")
+        if v_align not in ("top", "center", "bottom") or h_align not in ASS_TOP_ALIGNMENT:
+            v_align, h_align = "center", "center"
         
+        x = width // 2 if h_align == "center" else (50 if h_align == "left" else width - 50)
+        y = height // 2 if v_align == "center" else (50 if v_align == "top" else height - 150)
         
-        # Create base text clip
+        # MoviePy places the top edge of the text at y, so anchor ASS text at its top edge too
+        return ASS_TOP_ALIGNMENT[h_align], x, y
+    
+    def _hex_to_ass_color(self, color: str) -> str:
+        """Convert #RRGGBB to ASS &HAABBGGRR."""
+        color = color.lstrip("#")
+        if len(color) != 6:
+            return "&H00FFFFFF"
+        return f"&H00{color[4:6]}{color[2:4]}{color[0:2]}".upper()
+    
+    def _seconds_to_ass_time(self, seconds: float) -> str:
+        """Convert seconds to ASS time format (H:MM:SS.cc)."""
+        centiseconds = int(round(max(0.0, seconds) * 100))
+        hours, centiseconds = divmod(centiseconds, 360000)
+        minutes, centiseconds = divmod(centiseconds, 6000)
+        secs, centiseconds = divmod(centiseconds, 100)
+        return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+    
+    def _escape_ass_text(self, text: str) -> str:
+        """Neutralize characters that ASS treats as override tags."""
+        return text.replace("\\", "/").replace("{", "(").replace("}", ")").replace("\n", " ")
+    
+    def _wrap_ass_text(self, text: str, max_words_per_line: int) -> str:
+        """Wrap text to max_words_per_line using ASS hard line breaks."""
+        words = self._escape_ass_text(text).split()
+        n = max(1, max_words_per_line)
+        return "\\N".join(" ".join(words[i:i + n]) for i in range(0, len(words), n))
+    
+    def _format_text_for_video(self, text: str, max_words_per_line: int = 4) -> str:
+        """Wrap text to max_words_per_line (same as SubtitleService.format_text_for_video, without loading Whisper)."""
+        words = text.split()
+        n = max(1, max_words_per_line)
+        return '\n'.join(' '.join(words[i:i + n]) for i in range(0, len(words), n))
+    
+    def _text_clip_key(self, text: str, settings: Dict[str, Any]) -> tuple:
+        """Cache key for a rendered text bitmap: (text, fontsize, font, color, stroke_color, stroke_width, method)."""
         font_requested = settings.get("font-family", "DejaVu-Sans-Bold")
         
         # Use full path for Luckiest Guy to ensure it's found
         if font_requested == "Luckiest Guy":
-            font_path = "/usr/share/fonts/truetype/luckiest-guy/LuckiestGuy-Regular.ttf"
-            font_requested = font_path
-        
+            font_requested = "/usr/share/fonts/truetype/luckiest-guy/LuckiestGuy-Regular.ttf"
         
         # Check for both line-color and normal-color parameters for consistency
-        text_color = settings.get("line-color") or settings.get("normal-color", "#FFFFFF")
+        text_color = self._ass_text_color(settings)
         
         # Clean up any double hash symbols
         if text_color.startswith("##"):
             text_color = "#" + text_color[2:]
         
-        # Debug logging to see what color is being used
-        print(f"🎨 Color Debug - line-color: {settings.get('line-color')}")
-        print(f"🎨 Color Debug - normal-color: {settings.get('normal-color')}")
-        print(f"🎨 Color Debug - final text_color: {text_color}")
-        print(f"🎨 Color Debug - all settings: {list(settings.keys())}")
-        
-        txt_clip = TextClip(
+        return (
             text,
-            fontsize=settings.get("font-size", 100),
-            font=font_requested,
-            color=text_color,
-            stroke_color=settings.get("outline-color", "#000000"),
-            stroke_width=settings.get("outline-width", 3),
-            method='caption' if len(text) > 50 else 'label'
-        ).set_duration(duration)
-        
-        # Set position based on alignment with explicit pixel calculations
-        if h_align == "center" and v_align == "center":
-            # True vertical and horizontal centering - calculate exact pixel position
-            x_pos = 'center'
-            y_pos = video_size[1] // 2  # Exact vertical center in pixels
-            txt_clip = txt_clip.set_position((x_pos, y_pos))
-            
-        elif h_align == "center" and v_align == "bottom":
-            txt_clip = txt_clip.set_position(('center', video_size[1] - 150))
-            
-        elif h_align == "center" and v_align == "top":
-            txt_clip = txt_clip.set_position(('center', 50))
-            
-        else:
-            # Handle other positions
-            x_pos = "center" if h_align == "center" else (50 if h_align == "left" else video_size[0] - 50)
-            y_pos = (video_size[1] // 2) if v_align == "center" else (50 if v_align == "top" else video_size[1] - 150)
-            txt_clip = txt_clip.set_position((x_pos, y_pos))
-            print(f"📍 Setting subtitle to CUSTOM: x={x_pos}, y={y_pos}")
-        
-        return txt_clip
-    
-    def _create_karaoke_clips(self, subtitles: List[Dict[str, Any]], video_size: tuple, settings: Dict[str, Any]) -> List:
+            settings.get("font-size", 100),
+            font_requested,
+            text_color,
+            settings.get("outline-color", "#000000"),
+            settings.get("outline-width", 3),
+            'caption' if len(text) > 50 else 'label'
+        )
+    
+    def _render_text_clip(self, cache_key: tuple) -> ImageClip:
+        """Rasterize a text bitmap described by a _text_clip_key tuple."""
+        text, fontsize, font, color, stroke_color, stroke_width, method = cache_key
+        
+        pil_font = _load_font(font, fontsize)
+        if pil_font is None:
+            # Unknown font for Pillow - let ImageMagick resolve it
+            return TextClip(
+                text,
+                fontsize=fontsize,
+                font=font,
+                color=color,
+                stroke_color=stroke_color,
+                stroke_width=stroke_width,
+                method=method
+            )
+        
+        # Lay out and draw in-process instead of spawning ImageMagick
+        draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        left, top, right, bottom = draw.multiline_textbbox(
+            (0, 0), text, font=pil_font, stroke_width=stroke_width, align="center"
+        )
+        image = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+        ImageDraw.Draw(image).multiline_text(
+            (-left, -top), text, font=pil_font, fill=color, align="center",
+            stroke_width=stroke_width, stroke_fill=stroke_color
+        )
+        return ImageClip(np.array(image), transparent=True)
+    
+    def _prerender_text_clips(self, specs: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Rasterize the distinct (text, settings) pairs of a job concurrently into the text cache.
+        
+        Runs in threads so clips are shared through the cache without pickling them
+        across processes; ImageMagick fallbacks overlap their subprocesses.
+        """
+        keys = {self._text_clip_key(text, settings) for text, settings in specs if text}
+        missing = [key for key in keys if key not in self._text_cache]
+        if len(missing) < 2:
+            return
+        
+        with ThreadPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 4)) as executor:
+            for key, clip in zip(missing, executor.map(self._render_text_clip, missing)):
+                self._text_cache[key] = clip
+    
+    def _resolve_position(self, video_size: Tuple[int, int], settings: Dict[str, Any]) -> Tuple[Any, int]:
+        """Resolve the position setting to a MoviePy (x, y) position, once per job."""
+        v_align, _, h_align = settings.get("position", "center-center").partition("-")
+        if v_align not in ("top", "center", "bottom") or h_align not in ("left", "center", "right"):
+            v_align, h_align = "center", "center"
+        
+        # Explicit pixel offsets; the top edge of the text sits at y
+        x_pos = "center" if h_align == "center" else (50 if h_align == "left" else video_size[0] - 50)
+        y_pos = (video_size[1] // 2) if v_align == "center" else (50 if v_align == "top" else video_size[1] - 150)
+        return x_pos, y_pos
+    
+    def _create_styled_text_clip(self, text: str, position: Tuple[Any, int],
+                               settings: Dict[str, Any], duration: float) -> ImageClip:
+        """Create a styled text clip based on settings at a position from _resolve_position."""
+        # Rasterize each distinct text/style once per job and reuse the bitmap
+        cache_key = self._text_clip_key(text, settings)
+        base_clip = self._text_cache.get(cache_key)
+        if base_clip is None:
+            base_clip = self._text_cache[cache_key] = self._render_text_clip(cache_key)
+        
+        return base_clip.set_duration(duration).set_position(position)
+    
+    def _create_karaoke_clips(self, subtitles: List[Dict[str, Any]], position: Tuple[Any, int],
+                              settings: Dict[str, Any]) -> List:
         """Create karaoke-style subtitle clips with word highlighting."""
         clips = []
         
@@ -199,17 +736,28 @@ class VideoService:
         
         print(f"🎤 Creating karaoke clips for {len(subtitles)} segments")
         
+        highlight_settings = {
+            **settings,
+            "line-color": highlight_color,
+            "outline-width": settings.get("outline-width", 10) + 3,  # Thicker outline for highlighting
+            "font-size": settings.get("font-size", 120) + 10  # Slightly larger for emphasis
+        }
+        self._prerender_text_clips([
+            (word["word"].strip(), highlight_settings)
+            for subtitle in subtitles for word in subtitle.get("words") or []
+        ])
+        
         for i, subtitle in enumerate(subtitles):
             if not subtitle.get("words"):
                 # Fallback to sentence-level subtitle for this segment
-                formatted_text = subtitle_service.format_text_for_video(
+                formatted_text = self._format_text_for_video(
                     subtitle["text"], 
                     settings.get("max-words-per-line", 4)
                 )
                 
                 sentence_clip = self._create_styled_text_clip(
                     formatted_text,
-                    video_size,
+                    position,
                     {**settings, "line-color": normal_color},
                     duration=subtitle["end"] - subtitle["start"]
                 ).set_start(subtitle["start"])
@@ -224,13 +772,8 @@ class VideoService:
                     # Create highlighted word overlay
                     highlight_clip = self._create_styled_text_clip(
                         word_text,
-                        video_size,
-                        {
-                            **settings, 
-                            "line-color": highlight_color,
-                            "outline-width": settings.get("outline-width", 10) + 3,  # Thicker outline for highlighting
-                            "font-size": settings.get("font-size", 120) + 10  # Slightly larger for emphasis
-                        },
+                        position,
+                        highlight_settings,
                         duration=word["end"] - word["start"]
                     ).set_start(word["start"])
                     
@@ -240,10 +783,16 @@ class VideoService:
         
         return clips
     
-    def _create_popup_word_clips(self, subtitles: List[Dict[str, Any]], video_size: tuple, settings: Dict[str, Any]) -> List:
+    def _create_popup_word_clips(self, subtitles: List[Dict[str, Any]], position: Tuple[Any, int],
+                                 settings: Dict[str, Any]) -> List:
         """Create pop-up style clips showing one word at a time."""
         clips = []
         
+        self._prerender_text_clips([
+            (word["word"].strip(), settings)
+            for subtitle in subtitles for word in subtitle.get("words") or []
+        ])
+        
         for subtitle in subtitles:
             if not subtitle.get("words"):
                 continue
@@ -252,7 +801,7 @@ class VideoService:
                 # Create individual word clip
                 word_clip = self._create_styled_text_clip(
                     word["word"].strip(),
-                    video_size,
+                    position,
                     settings,
                     duration=word["end"] - word["start"]
                 ).set_start(word["start"])
@@ -261,32 +810,78 @@ class VideoService:
         
         return clips
     
-    def _create_typewriter_clips(self, subtitles: List[Dict[str, Any]], video_size: tuple, settings: Dict[str, Any]) -> List:
+    def _create_typewriter_clips(self, subtitles: List[Dict[str, Any]], position: Tuple[Any, int],
+                                 video_size: tuple, settings: Dict[str, Any]) -> List:
         """Create typewriter style clips that build text word by word."""
         clips = []
         
+        # Short lines are rendered once and cropped; long captions render every prefix
+        specs = []
+        for subtitle in subtitles:
+            words = [word["word"].strip() for word in subtitle.get("words") or []]
+            full_text = " ".join(words)
+            if len(full_text) > 50:
+                specs.extend((" ".join(words[:i + 1]), settings) for i in range(len(words)))
+            else:
+                specs.append((full_text, settings))
+        self._prerender_text_clips(specs)
+        
         for subtitle in subtitles:
             if not subtitle.get("words"):
                 continue
                 
-            accumulated_text = ""
+            words = [word["word"].strip() for word in subtitle["words"]]
+            full_text = " ".join(words)
             
-            for i, word in enumerate(subtitle["words"]):
-                accumulated_text += word["word"]
-                
-                # Create clip with accumulated text
-                typewriter_clip = self._create_styled_text_clip(
-                    accumulated_text.strip(),
-                    video_size,
-                    settings,
-                    duration=word["end"] - word["start"]
-                ).set_start(word["start"])
+            if len(full_text) > 50:
+                # Caption mode wraps lines, so prefixes are not horizontal crops of the full line
+                prefix = []
+                for word, text in zip(subtitle["words"], words):
+                    prefix.append(text)
+                    clips.append(self._create_styled_text_clip(
+                        " ".join(prefix),
+                        position,
+                        settings,
+                        duration=word["end"] - word["start"]
+                    ).set_start(word["start"]))
+                continue
+            
+            # Rasterize the full line once and reveal it word by word with crops
+            full_clip = self._create_styled_text_clip(full_text, position, settings, duration=0)
+            origin = self._resolve_clip_position(position, full_clip.size, video_size)
+            offsets = self._measure_prefix_widths(words, full_clip.w, settings)
+            
+            for word, x2 in zip(subtitle["words"], offsets):
+                typewriter_clip = full_clip.crop(x1=0, x2=x2) \
+                    .set_duration(word["end"] - word["start"]) \
+                    .set_position(origin) \
+                    .set_start(word["start"])
                 
                 clips.append(typewriter_clip)
         
         return clips
     
-    def split_video(self, video_path: str, start_time: float, end_time: float, output_path: str) -> str:
+    def _measure_prefix_widths(self, words: List[str], clip_width: int, settings: Dict[str, Any]) -> List[int]:
+        """Pixel width of each word prefix of a single rendered line, scaled to the rendered clip."""
+        font = (_load_font(settings.get("font-family", "DejaVu-Sans-Bold"), settings.get("font-size", 100))
+                or _load_font("DejaVu-Sans-Bold", settings.get("font-size", 100))
+                or ImageFont.load_default())
+        
+        draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+        full_width = draw.textlength(" ".join(words), font=font) or 1
+        stroke = settings.get("outline-width", 3)
+        
+        widths = []
+        advance = 0.0
+        for i, word in enumerate(words):
+            advance += draw.textlength(word if i == 0 else " " + word, font=font)
+            # Keep the outline of the last revealed glyph
+            widths.append(min(clip_width, max(1, int(round(clip_width * advance / full_width)) + stroke)))
+        widths[-1] = clip_width
+        return widths
+    
+    def split_video(self, video_path: str, start_time: float, end_time: float, output_path: str,
+                    precise: bool = False) -> str:
         """
         Split a video from start_time to end_time.
         
@@ -295,10 +890,33 @@ class VideoService:
             start_time: Start time in seconds
             end_time: End time in seconds
             output_path: Path for output video
+            precise: Re-encode for frame-accurate cuts instead of stream-copying
+                     (stream copy snaps the start to the nearest keyframe)
             
         Returns:
             Path to the output video
         """
+        if not precise:
+            start_time = max(0, start_time)
+            if start_time >= end_time:
+                raise Exception("Error splitting video: Start time must be less than end time")
+            
+            cmd = [
+                "ffmpeg", "-y",
+                "-ss", str(start_time),
+                "-i", video_path,
+                "-t", str(end_time - start_time),
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+                "-loglevel", "error",
+                output_path
+            ]
+            try:
+                subprocess.run(cmd, check=True, capture_output=True, text=True)
+                return output_path
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"⚠️ Stream-copy split failed ({e}), re-encoding with MoviePy")
+        
         try:
             # Load video
             video = VideoFileClip(video_path)
@@ -315,12 +933,15 @@ class VideoService:
             split_video = video.subclip(start_time, end_time)
             
             # Write output
+            encoder = self._moviepy_encoder()
             split_video.write_videofile(
                 output_path,
-                codec='libx264',
+                codec=encoder,
                 audio_codec='aac',
                 verbose=False,
-                logger=None
+                logger=None,
+                threads=ENCODER_THREADS,
+                ffmpeg_params=_h264_ffmpeg_params(encoder)
             )
             
             # Clean up
@@ -344,14 +965,19 @@ class VideoService:
             Path to the output video
         """
         try:
+            for path in video_paths:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Video file not found: {path}")
+            
+            # Fast path: identical codec parameters can be concatenated without re-encoding
+            if video_paths and self._join_videos_concat_copy(video_paths, output_path):
+                return output_path
+            
             # Load all videos
             video_clips = []
             for path in video_paths:
-                if os.path.exists(path):
-                    clip = VideoFileClip(path)
-                    video_clips.append(clip)
-                else:
-                    raise FileNotFoundError(f"Video file not found: {path}")
+                clip = VideoFileClip(path)
+                video_clips.append(clip)
             
             if not video_clips:
                 raise ValueError("No valid video clips to join")
@@ -360,12 +986,15 @@ class VideoService:
             final_video = concatenate_videoclips(video_clips, method="compose")
             
             # Write output
+            encoder = self._moviepy_encoder()
             final_video.write_videofile(
                 output_path,
-                codec='libx264',
+                codec=encoder,
                 audio_codec='aac',
                 verbose=False,
-                logger=None
+                logger=None,
+                threads=ENCODER_THREADS,
+                ffmpeg_params=_h264_ffmpeg_params(encoder)
             )
             
             # Clean up
@@ -393,60 +1022,49 @@ class VideoService:
             Path to the output video
         """
         try:
-            # Load video and audio
-            video = VideoFileClip(video_path)
-            music = AudioFileClip(music_path)
-            
             # Get settings
             volume = settings.get("volume", 0.5)
             fade_in = settings.get("fade_in", 0)
             fade_out = settings.get("fade_out", 0)
             loop_music = settings.get("loop_music", False)
             
-            # Adjust music volume
-            music = music.volumex(volume)
-            
-            # Loop music if requested and video is longer
-            if loop_music and music.duration < video.duration:
-                # Calculate how many times to loop
-                loops_needed = math.ceil(video.duration / music.duration)
-                music_clips = [music] * loops_needed
-                music = concatenate_audioclips(music_clips)
+            probe = self._probe(video_path)
+            video_duration = float(probe["format"]["duration"])
+            has_audio = any(stream.get("codec_type") == "audio" for stream in probe.get("streams", []))
             
-            # Trim music to video length
-            if music.duration > video.duration:
-                music = music.subclip(0, video.duration)
-            
-            # Apply fade effects
+            # Music chain: volume, then fades (trimmed to the video length by -t below)
+            music_filters = [f"volume={volume}"]
             if fade_in > 0:
-                music = music.fadeout(fade_in)
+                music_filters.append(f"afade=t=in:st=0:d={fade_in}")
             if fade_out > 0:
-                music = music.fadeout(fade_out)
+                music_filters.append(f"afade=t=out:st={max(0.0, video_duration - fade_out)}:d={fade_out}")
+            filter_complex = f"[1:a]{','.join(music_filters)}[m]"
             
-            # Composite original audio with music
-            if video.audio is not None:
-                # Mix original audio with music
-                final_audio = CompositeAudioClip([video.audio, music])
+            if has_audio:
+                # Mix original audio with music without attenuating either input
+                filter_complex += ";[0:a][m]amix=inputs=2:duration=first:normalize=0[a]"
+                audio_label = "[a]"
             else:
                 # Use only music
-                final_audio = music
-            
-            # Create final video
-            final_video = video.set_audio(final_audio)
+                audio_label = "[m]"
             
-            # Write output
-            final_video.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                verbose=False,
-                logger=None
-            )
+            cmd = ["ffmpeg", "-y", "-i", video_path]
+            if loop_music:
+                cmd += ["-stream_loop", "-1"]
+            cmd += [
+                "-i", music_path,
+                "-filter_complex", filter_complex,
+                "-map", "0:v", "-map", audio_label,
+                "-c:v", "copy",
+                "-c:a", "aac",
+                "-t", str(video_duration),
+                "-loglevel", "error",
+                output_path
+            ]
             
-            # Clean up
-            video.close()
-            music.close()
-            final_video.close()
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise Exception(f"FFmpeg music mix failed: {result.stderr.strip()}")
             
             return output_path
             
@@ -464,19 +1082,25 @@ class VideoService:
             Dictionary with video information
         """
         try:
-            video = VideoFileClip(video_path)
+            # Metadata only - ffprobe avoids spinning up a MoviePy frame reader
+            probe = self._probe(video_path)
+            streams = probe.get("streams", [])
+            video_stream = next(s for s in streams if s.get("codec_type") == "video")
             
-            info = {
-                "duration": video.duration,
-                "fps": video.fps,
-                "size": video.size,
-                "width": video.w,
-                "height": video.h,
-                "has_audio": video.audio is not None
-            }
+            fps = (self._parse_frame_rate(video_stream.get("avg_frame_rate"))
+                   or self._parse_frame_rate(video_stream.get("r_frame_rate")))
             
-            video.close()
-            return info
+            width, height = int(video_stream["width"]), int(video_stream["height"])
+            duration = probe.get("format", {}).get("duration") or video_stream.get("duration") or 0
+            
+            return {
+                "duration": float(duration),
+                "fps": fps,
+                "size": [width, height],
+                "width": width,
+                "height": height,
+                "has_audio": any(s.get("codec_type") == "audio" for s in streams)
+            }
             
         except Exception as e:
             raise Exception(f"Error getting video info: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Asynchronous batch downloader built on aiohttp.
+
+Plain URLs are streamed concurrently over one shared connection pool, bounded by a
+semaphore; Google Drive URLs reuse the strategy racing in download_utils on a worker
+thread so both paths share the same bypass logic.
+"""
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+import aiohttp
+
+from app.utils.download_utils import (
+    DownloadError,
+    download_file,
+    _destination_path,
+    _discard_scratch,
+    _finish_scratch,
+    _is_google_drive_url,
+    _looks_like_html,
+    _open_scratch,
+    _preallocate,
+    _verify_download,
+    _chunk_sizer,
+    _CHUNK_SIZE,
+    _HEAD_PEEK_SIZE,
+    _HTML_SIGNATURE_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bound outstanding requests so batches don't trip per-host rate limits
+MAX_CONCURRENT_DOWNLOADS = 8
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Network read size; reads are batched into one executor write of up to _CHUNK_SIZE
+_READ_SIZE = 64 * 1024
+
+async def _read_head(response: aiohttp.ClientResponse) -> bytes:
+    """Read at least the HTML signature window (or the whole body, if shorter)"""
+    head = b''
+    while len(head) < _HTML_SIGNATURE_WINDOW:
+        chunk = await response.content.read(_HEAD_PEEK_SIZE - len(head))
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+async def _stream_to_file(response: aiohttp.ClientResponse, file_path: str) -> None:
+    """Stream a response body to disk, rejecting HTML pages before anything is written"""
+    loop = asyncio.get_running_loop()
+    
+    first = await _read_head(response)
+    if not first:
+        raise DownloadError("Server returned an empty response")
+    if _looks_like_html(first[:_HTML_SIGNATURE_WINDOW]):
+        raise DownloadError("Server returned an HTML page instead of the file")
+    
+    # Same scratch-file path as the synchronous downloader: nothing appears under
+    # file_path until the whole body is on disk
+    f = await loop.run_in_executor(None, _open_scratch, file_path)
+    try:
+        await loop.run_in_executor(None, _preallocate, f, response)
+        
+        # Disk writes go to the default executor in large batches, one thread hop per batch
+        batch_size = min(_chunk_sizer.chunk_size, _CHUNK_SIZE)
+        batch, batched = [first], len(first)
+        async for chunk in response.content.iter_chunked(_READ_SIZE):
+            batch.append(chunk)
+            batched += len(chunk)
+            if batched >= batch_size:
+                await loop.run_in_executor(None, f.writelines, batch)
+                batch, batched = [], 0
+        await loop.run_in_executor(None, f.writelines, batch)
+        downloaded = await loop.run_in_executor(None, _finish_scratch, f, file_path)
+    except BaseException:
+        # Also on cancellation - close (and unlink the fallback file) without awaiting
+        _discard_scratch(f, file_path)
+        raise
+    
+    f.close()
+    _chunk_sizer.record(downloaded)
+
+async def download_file_async(session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, url: str,
+                              destination_dir: str, filename: Optional[str] = None) -> str:
+    """
+    Download a single file on an existing aiohttp session
+    
+    Args:
+        session: Shared aiohttp session
+        semaphore: Limits concurrent downloads
+        url: URL of the file to download
+        destination_dir: Directory to save the file
+        filename: Optional filename. If not provided, will be generated
+        
+    Returns:
+        Path to the downloaded file
+        
+    Raises:
+        DownloadError: If download fails
+    """
+    async with semaphore:
+        if _is_google_drive_url(url):
+            # Drive needs the synchronous strategy racing (cookies, confirm tokens)
+            return await asyncio.to_thread(download_file, url, destination_dir, filename)
+        
+        file_path = _destination_path(url, destination_dir, filename)
+        logger.info(f"🔽 DOWNLOADING (async): {url}")
+        
+        try:
+            async with session.get(url) as response:
+                if response.status >= 400:
+                    raise DownloadError(f"Failed to download {url}: HTTP {response.status}")
+                await _stream_to_file(response, file_path)
+        except aiohttp.ClientError as e:
+            raise DownloadError(f"Failed to download {url}: {str(e)}")
+        
+        if not _verify_download(file_path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise DownloadError("Downloaded file verification failed")
+        
+        return file_path
+
+async def download_files_async(urls: List[str], destination_dir: str,
+                               filenames: Optional[List[str]] = None,
+                               max_concurrent: int = MAX_CONCURRENT_DOWNLOADS) -> List[str]:
+    """
+    Download several files concurrently
+    
+    Returns:
+        Paths to the downloaded files, in the same order as urls
+        
+    Raises:
+        DownloadError: If any download fails
+    """
+    filenames = filenames or [None] * len(urls)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    connector = aiohttp.TCPConnector(limit=64, limit_per_host=8, keepalive_timeout=75)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     headers={'User-Agent': USER_AGENT}) as session:
+        return await asyncio.gather(*(
+            download_file_async(session, semaphore, url, destination_dir, name)
+            for url, name in zip(urls, filenames)
+        ))
+
+def download_files_sync(urls: List[str], destination_dir: str,
+                        filenames: Optional[List[str]] = None) -> List[str]:
+    """Blocking wrapper for callers outside an event loop (e.g. Flask job threads)"""
+    return asyncio.run(download_files_async(urls, destination_dir, filenames))
@@ -1,240 +1,650 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import shutil
 import uuid
 import re
 import time
+import random
+import json
+import math
+import threading
 from urllib.parse import urlparse, parse_qs
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from functools import lru_cache, wraps
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DownloadError(Exception):
     pass
 
+# Precompiled Google Drive patterns
+_DRIVE_HOST_RE = re.compile(r'drive\.google\.com|docs\.google\.com|googleapis\.com', re.IGNORECASE)
+_DRIVE_ID_PATTERNS = [re.compile(p) for p in (
+    r'/file/d/([a-zA-Z0-9_-]+)',
+    r'id=([a-zA-Z0-9_-]+)',
+    r'/d/([a-zA-Z0-9_-]+)',
+)]
+# Confirm-token patterns fused into one alternation (one capture group per branch, in
+# priority order) so the HTML page is scanned once instead of once per pattern
+_CONFIRM_UNION = re.compile('|'.join((
+    r'confirm=([a-zA-Z0-9_-]{10,})',
+    r'"confirm"\s*:\s*"([a-zA-Z0-9_-]+)"',
+    r'name="confirm"\s+value="([^"]+)"',
+    r'&amp;confirm=([a-zA-Z0-9_-]+)',
+    r'/uc\?export=download[^"]*&confirm=([a-zA-Z0-9_-]+)',
+)))
+
+# Extension guessing for URLs without a usable filename
+_KNOWN_EXTENSIONS = frozenset({
+    '.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm',
+    '.mp3', '.wav', '.aac', '.ogg', '.flac', '.m4a',
+})
+_VIDEO_KEYWORDS_RE = re.compile(r'video|mp4|avi|mov')
+_AUDIO_KEYWORDS_RE = re.compile(r'audio|music|mp3|sound')
+
+# Streaming: peek at the first 64 KiB for HTML, then copy in reads sized by _chunk_sizer (at most 8 MiB)
+_HEAD_PEEK_SIZE = 64 * 1024
+_HTML_SIGNATURE_WINDOW = 4096
+_HTML_PEEK_SIZE = 16 * 1024  # Head of a Drive interstitial searched for its confirm token
+_COPY_BUFFER_SIZE = 8 * 1024 * 1024
+_CHUNK_SIZE = 4 * 1024 * 1024  # Upper bound for async chunks, which are held in memory per download
+
+class _ChunkSizer:
+    """
+    Pick the copy buffer size from recent download sizes
+    
+    Sizes are counted in power-of-two buckets from 8 KiB to 1 MiB (the last bucket
+    also takes everything larger). Every `window` downloads the buffer is set to ten
+    times the 99th-percentile bucket, clamped to [64 KiB, 8 MiB], and counting restarts.
+    """
+    MIN_BUCKET = 8 * 1024
+    BUCKETS = 8
+    
+    def __init__(self, initial: int = _COPY_BUFFER_SIZE, low: int = 64 * 1024,
+                 high: int = _COPY_BUFFER_SIZE, window: int = 128):
+        self.chunk_size = initial
+        self._low = low
+        self._high = high
+        self._window = window
+        self._counts = [0] * self.BUCKETS
+        self._recorded = 0
+        self._lock = threading.Lock()
+    
+    def record(self, size: int) -> None:
+        """Count one completed download of size bytes"""
+        blocks = -(-size // self.MIN_BUCKET)  # ceil
+        bucket = min(max(blocks - 1, 0).bit_length(), self.BUCKETS - 1)
+        with self._lock:
+            self._counts[bucket] += 1
+            self._recorded += 1
+            if self._recorded >= self._window:
+                self._resize()
+    
+    def _resize(self) -> None:
+        threshold = 0.99 * self._recorded
+        seen = 0
+        for bucket, count in enumerate(self._counts):
+            seen += count
+            if seen >= threshold:
+                break
+        p99 = self.MIN_BUCKET << bucket
+        self.chunk_size = min(max(p99 * 10, self._low), self._high)
+        self._counts = [0] * self.BUCKETS
+        self._recorded = 0
+
+_chunk_sizer = _ChunkSizer()
+
+# Shared session so repeated downloads reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+})
+_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=20, pool_block=False)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+
+def get_session() -> requests.Session:
+    """Return the shared download session (e.g. to add headers, proxies or mount adapters)."""
+    return _SESSION
+
+def _drive_session(template: requests.Session) -> requests.Session:
+    """
+    Fresh session for one Drive strategy attempt, sharing the pooled adapter
+    
+    Drive's warmup and download_warning confirm cookies must not leak between racing
+    strategies or between files, and a cookie jar isn't safe to mutate from several
+    threads, so each attempt gets its own jar. Headers and proxies are copied from template.
+    Never close() these sessions - that would close the shared adapter's pool.
+    """
+    session = requests.Session()
+    session.headers.update(template.headers)
+    session.proxies.update(template.proxies)
+    session.mount('http://', _ADAPTER)
+    session.mount('https://', _ADAPTER)
+    return session
+
+@lru_cache(maxsize=4096)
 def _extract_google_drive_file_id(url: str) -> Optional[str]:
     """Extract file ID from various Google Drive URL formats"""
-    patterns = [
-        r'/file/d/([a-zA-Z0-9_-]+)',
-        r'id=([a-zA-Z0-9_-]+)',
-        r'/d/([a-zA-Z0-9_-]+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _DRIVE_ID_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     return None
 
 def _is_google_drive_url(url: str) -> bool:
     """Check if URL is a Google Drive URL."""
-    return any(domain in url.lower() for domain in [
-        'drive.google.com', 
-        'docs.google.com',
-        'googleapis.com'
-    ])
+    return _DRIVE_HOST_RE.search(url) is not None
 
-def _download_google_drive_file(file_id: str, destination_path: str) -> bool:
+# Transient failures worth retrying; anything else (404, 401, ...) fails immediately
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def _retry(fn, *, max_retries: int = 3, base: float = 1.0, cap: float = 30.0, jitter: float = 0.5):
     """
-    Enhanced Google Drive download with multiple bypass strategies
+    Call fn() with capped exponential backoff and jitter on transient errors
     
-    Returns:
-        True if successful download, False otherwise
+    Retries on connection errors, timeouts and 429/5xx responses; the last
+    response (or exception) is returned (or raised) once retries run out.
     """
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    })
+    for attempt in range(max_retries + 1):
+        try:
+            response = fn()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == max_retries:
+                raise
+        else:
+            if response.status_code not in _RETRY_STATUSES or attempt == max_retries:
+                return response
+            response.close()
+        
+        delay = min(cap, base * 2 ** attempt) * (1 + random.uniform(-jitter, jitter))
+        logger.warning(f"   ⏳ Transient error, retrying in {delay:.1f}s ({attempt + 1}/{max_retries})")
+        time.sleep(delay)
+
+def _get(session: requests.Session, url: str, **kwargs) -> requests.Response:
+    """session.get with retry/backoff on transient errors"""
+    return _retry(lambda: session.get(url, **kwargs))
+
+def _accept_download(response: requests.Response) -> Optional[requests.Response]:
+    """Return the response if it is a file download (not an HTML page), else close it and return None."""
+    if response.status_code == 200:
+        content_type = response.headers.get('content-type', '').lower()
+        if 'text/html' not in content_type:
+            return response
+    response.close()
+    return None
+
+# HEAD statuses meaning "HEAD not supported here" - fall back to probing with GET
+_HEAD_UNSUPPORTED = (405, 501)
+
+def _head_rejects(session: requests.Session, url: str) -> bool:
+    """HEAD-probe url and report whether it is clearly not a file download (HTML page or tiny body)"""
+    try:
+        head = session.head(url, allow_redirects=True, timeout=30)
+    except requests.exceptions.RequestException:
+        return False  # Let the GET decide
     
-    print(f"🚀 ENHANCED GOOGLE DRIVE DOWNLOAD")
-    print(f"🆔 File ID: {file_id}")
-    print(f"💾 Destination: {destination_path}")
+    with head:
+        if head.status_code in _HEAD_UNSUPPORTED:
+            return False
+        if head.status_code != 200:
+            return True
+        if 'text/html' in head.headers.get('content-type', '').lower():
+            return True
+        content_length = head.headers.get('content-length')
+        return content_length is not None and content_length.isdigit() and int(content_length) < 1000
+
+def _fetch_download(session: requests.Session, url: str, timeout: int = 120, **kwargs) -> Optional[requests.Response]:
+    """HEAD-probe url, then stream it with GET only if it looks like a file download"""
+    if _head_rejects(session, url):
+        return None
+    return _accept_download(_get(session, url, stream=True, timeout=timeout, **kwargs))
+
+def _strategy_direct(session: requests.Session, file_id: str) -> Optional[requests.Response]:
+    """Strategy 1: Direct download"""
+    download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+    return _fetch_download(session, download_url, timeout=30)
+
+def _strategy_confirm_token(session: requests.Session, file_id: str) -> Optional[requests.Response]:
+    """Strategy 2: Confirmation token bypass"""
+    scan_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+    response = _get(session, scan_url, stream=True, timeout=30)
+    if response.status_code != 200:
+        response.close()
+        return None
     
-    # Strategy 1: Direct download
-    print(f"\n🔄 STRATEGY 1: Direct download")
-    try:
-        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        response = session.get(download_url, stream=True, timeout=30)
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                print(f"✅ Direct download successful")
-                _save_response_to_file(response, destination_path)
-                return _verify_download(destination_path)
-        print(f"❌ Direct download failed - virus scan detected")
-    except Exception as e:
-        print(f"❌ Direct download error: {e}")
+    # No interstitial - Drive is serving the file itself, so this is already the download
+    if 'text/html' not in response.headers.get('content-type', '').lower():
+        return response
     
-    # Strategy 2: Confirmation token bypass
-    print(f"\n🔄 STRATEGY 2: Confirmation token bypass")
-    try:
-        scan_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        response = session.get(scan_url, timeout=30)
-        
-        if response.status_code == 200:
-            # Extract confirmation token from HTML
-            confirm_patterns = [
-                r'confirm=([a-zA-Z0-9_-]{10,})',
-                r'"confirm"\\s*:\\s*"([a-zA-Z0-9_-]+)"',
-                r'name="confirm"\\s+value="([^"]+)"',
-                r'&amp;confirm=([a-zA-Z0-9_-]+)',
-                r'/uc\\?export=download[^"]*&confirm=([a-zA-Z0-9_-]+)',
-            ]
-            
-            confirm_token = None
-            for pattern in confirm_patterns:
-                matches = re.findall(pattern, response.text)
-                if matches:
-                    # Get the longest match (usually more specific)
-                    confirm_token = max(matches, key=len)
-                    print(f"🎟️  Found confirm token: {confirm_token[:15]}...")
-                    break
-            
-            if confirm_token:
-                confirmed_url = f"https://drive.google.com/uc?export=download&id={file_id}&confirm={confirm_token}"
-                download_response = session.get(confirmed_url, stream=True, timeout=120)
-                if download_response.status_code == 200:
-                    content_type = download_response.headers.get('content-type', '').lower()
-                    if 'text/html' not in content_type:
-                        print(f"✅ Confirmation bypass successful")
-                        _save_response_to_file(download_response, destination_path)
-                        return _verify_download(destination_path)
-            
-        print(f"❌ Confirmation bypass failed")
-    except Exception as e:
-        print(f"❌ Confirmation bypass error: {e}")
+    # The token sits near the top of the page; never buffer more than its head
+    with response:
+        response.raw.decode_content = True
+        page = response.raw.read(_HTML_PEEK_SIZE).decode(response.encoding or 'utf-8', errors='replace')
     
-    # Strategy 3: Google UserContent domain
-    print(f"\n🔄 STRATEGY 3: UserContent domain")
-    usercontent_urls = [
-        f"https://drive.usercontent.google.com/download?id={file_id}&export=download&authuser=0",
-        f"https://drive.usercontent.google.com/download?id={file_id}&export=download&authuser=0&confirm=t",
-    ]
+    # Extract confirmation token from HTML
+    matches_by_pattern = {}
+    for match in _CONFIRM_UNION.finditer(page):
+        matches_by_pattern.setdefault(match.lastindex, []).append(match.group(match.lastindex))
     
-    for url in usercontent_urls:
-        try:
-            print(f"   📡 Trying: {url[:80]}...")
-            response = session.get(url, stream=True, timeout=120, allow_redirects=True)
-            if response.status_code == 200:
-                content_type = response.headers.get('content-type', '').lower()
-                if 'text/html' not in content_type:
-                    print(f"✅ UserContent domain successful")
-                    _save_response_to_file(response, destination_path)
-                    return _verify_download(destination_path)
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
+    if not matches_by_pattern:
+        return None
     
-    print(f"❌ UserContent domain failed")
+    # Highest-priority pattern wins; take its longest match (usually more specific)
+    confirm_token = max(matches_by_pattern[min(matches_by_pattern)], key=len)
+    logger.info(f"🎟️  Found confirm token: {confirm_token[:15]}...")
     
-    # Strategy 4: Session-based download
-    print(f"\n🔄 STRATEGY 4: Session-based download")
+    confirmed_url = f"https://drive.google.com/uc?export=download&id={file_id}&confirm={confirm_token}"
+    return _fetch_download(session, confirmed_url, timeout=120)
+
+_USERCONTENT_TEMPLATES = (
+    "https://drive.usercontent.google.com/download?id={fid}&export=download&authuser=0",
+    "https://drive.usercontent.google.com/download?id={fid}&export=download&authuser=0&confirm=t",
+)
+
+def _strategy_usercontent(session: requests.Session, file_id: str) -> Optional[requests.Response]:
+    """Strategy 3: Google UserContent domain"""
+    return _try_download_urls(session, [t.format(fid=file_id) for t in _USERCONTENT_TEMPLATES])
+
+# Google session cookies that mark the file-page visit as established
+_SESSION_COOKIES = ('NID', 'SID', 'AEC')
+
+def _wait_for_session_cookies(session: requests.Session, timeout: float = 2.0, interval: float = 0.1) -> bool:
+    """Return as soon as a Google session cookie is present (polling up to timeout)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if any(name in session.cookies for name in _SESSION_COOKIES):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+def _strategy_session(session: requests.Session, file_id: str) -> Optional[requests.Response]:
+    """Strategy 4: Session-based download"""
+    # Visit file page to establish session
+    file_url = f"https://drive.google.com/file/d/{file_id}/view"
+    _get(session, file_url, timeout=30)
+    _wait_for_session_cookies(session)
+    
+    # Try download with session
+    download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
+    return _fetch_download(session, download_url, timeout=120)
+
+_ALTERNATIVE_TEMPLATES = (
+    "https://docs.google.com/uc?export=download&id={fid}",
+    "https://drive.google.com/u/0/uc?export=download&id={fid}",
+    "https://drive.google.com/uc?export=download&id={fid}&resourcekey=0",
+    "https://drive.google.com/uc?id={fid}&export=download&confirm=t",
+)
+
+def _strategy_alternative_domains(session: requests.Session, file_id: str) -> Optional[requests.Response]:
+    """Strategy 5: Alternative domains and parameters"""
+    return _try_download_urls(session, [t.format(fid=file_id) for t in _ALTERNATIVE_TEMPLATES])
+
+# Pages visited to build up cookies before the final download attempt
+_REDIRECT_WARMUP_TEMPLATES = (
+    "https://drive.google.com",
+    "https://drive.google.com/file/d/{fid}/view",
+    "https://drive.google.com/uc?id={fid}",
+)
+_REDIRECT_DOWNLOAD_TEMPLATE = "https://drive.google.com/uc?export=download&id={fid}&confirm=t"
+
+def _strategy_redirects(session: requests.Session, file_id: str) -> Optional[requests.Response]:
+    """Strategy 6: Multiple redirects and cookies"""
+    # Build up cookies by visiting multiple pages concurrently (they share the session's cookie jar)
+    warmup_urls = [t.format(fid=file_id) for t in _REDIRECT_WARMUP_TEMPLATES]
+    with ThreadPoolExecutor(max_workers=len(warmup_urls)) as executor:
+        for response in executor.map(lambda url: _get(session, url, timeout=30), warmup_urls):
+            response.close()
+    
+    # Final download attempt
+    final_url = _REDIRECT_DOWNLOAD_TEMPLATE.format(fid=file_id)
+    return _fetch_download(session, final_url, timeout=120, allow_redirects=True)
+
+def _try_download_urls(session: requests.Session, urls: List[str]) -> Optional[requests.Response]:
+    """Try candidate URLs in order and return the first file download."""
+    for url in urls:
+        try:
+            logger.debug(f"   📡 Trying: {url[:80]}...")
+            response = _fetch_download(session, url, timeout=120, allow_redirects=True)
+            if response is not None:
+                return response
+        except Exception as e:
+            logger.warning(f"   ❌ Error: {e}")
+    return None
+
+# Download strategies in order of preference
+_DRIVE_STRATEGIES = [
+    ("Direct download", _strategy_direct),
+    ("Confirmation bypass", _strategy_confirm_token),
+    ("UserContent domain", _strategy_usercontent),
+    ("Session-based download", _strategy_session),
+    ("Alternative domain", _strategy_alternative_domains),
+    ("Multiple redirects", _strategy_redirects),
+]
+
+# Persisted per-strategy (success, fail) counts used to rank strategies across restarts
+_STRATEGY_STATS_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'videoeditorapi', 'drive_strategy_stats.json'
+)
+# Start offset between consecutive strategies in rank order
+_STRATEGY_STAGGER = 0.5
+_strategy_stats_lock = threading.Lock()
+
+def _load_strategy_stats() -> Dict[str, List[int]]:
+    """Read persisted strategy stats; missing or corrupt files start from zero"""
     try:
-        # Visit file page to establish session
-        file_url = f"https://drive.google.com/file/d/{file_id}/view"
-        session.get(file_url, timeout=30)
-        time.sleep(2)  # Wait for session
-        
-        # Try download with session
-        download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-        response = session.get(download_url, stream=True, timeout=120)
-        
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                print(f"✅ Session-based download successful")
-                _save_response_to_file(response, destination_path)
-                return _verify_download(destination_path)
+        with open(_STRATEGY_STATS_PATH, 'r') as f:
+            return {name: [int(ok), int(failed)] for name, (ok, failed) in json.load(f).items()}
+    except (OSError, ValueError, TypeError):
+        return {}
+
+_strategy_stats = _load_strategy_stats()
+
+def _wilson_lower_bound(successes: int, failures: int, z: float = 1.96) -> float:
+    """Lower bound of the Wilson score interval for the success rate"""
+    n = successes + failures
+    if n == 0:
+        return 0.0
+    p = successes / n
+    return (p + z * z / (2 * n) - z * math.sqrt((p * (1 - p) + z * z / (4 * n)) / n)) / (1 + z * z / n)
+
+def _ranked_strategies() -> List[Tuple[str, Callable]]:
+    """Strategies ordered by historical success (ties keep the default order)"""
+    with _strategy_stats_lock:
+        scores = {name: _wilson_lower_bound(*_strategy_stats.get(name, (0, 0))) for name, _ in _DRIVE_STRATEGIES}
+    return sorted(_DRIVE_STRATEGIES, key=lambda item: -scores[item[0]])
+
+def _record_strategy_outcomes(outcomes: Dict[str, bool]) -> None:
+    """Add attempt outcomes to the stats and persist them atomically"""
+    if not outcomes:
+        return
+    
+    with _strategy_stats_lock:
+        for name, succeeded in outcomes.items():
+            counts = _strategy_stats.setdefault(name, [0, 0])
+            counts[0 if succeeded else 1] += 1
         
-        print(f"❌ Session-based download failed")
-    except Exception as e:
-        print(f"❌ Session-based download error: {e}")
-    
-    # Strategy 5: Alternative domains and parameters
-    print(f"\n🔄 STRATEGY 5: Alternative domains")
-    alternative_urls = [
-        f"https://docs.google.com/uc?export=download&id={file_id}",
-        f"https://drive.google.com/u/0/uc?export=download&id={file_id}",
-        f"https://drive.google.com/uc?export=download&id={file_id}&resourcekey=0",
-        f"https://drive.google.com/uc?id={file_id}&export=download&confirm=t"
-    ]
-    
-    for url in alternative_urls:
         try:
-            print(f"   📡 Trying: {url[:80]}...")
-            response = session.get(url, stream=True, timeout=120, allow_redirects=True)
-            if response.status_code == 200:
-                content_type = response.headers.get('content-type', '').lower()
-                if 'text/html' not in content_type:
-                    print(f"✅ Alternative domain successful")
-                    _save_response_to_file(response, destination_path)
-                    return _verify_download(destination_path)
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
+            os.makedirs(os.path.dirname(_STRATEGY_STATS_PATH), exist_ok=True)
+            tmp_path = f"{_STRATEGY_STATS_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(_strategy_stats, f)
+            os.replace(tmp_path, _STRATEGY_STATS_PATH)
+        except OSError as e:
+            logger.warning(f"Could not save strategy stats: {e}")
+
+def _run_strategy(strategy: Callable, session: requests.Session, file_id: str,
+                  delay: float, stop: threading.Event) -> Optional[requests.Response]:
+    """Run a strategy after its start offset on its own session, unless the race is already decided"""
+    if stop.wait(delay):
+        return None
+    return strategy(_drive_session(session), file_id)
+
+def _close_response_future(future) -> None:
+    """Done-callback closing the streaming response of a losing strategy."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    response = future.result()
+    if response is not None:
+        response.close()
+
+def _race_strategies(strategies: List[Tuple[str, Callable]], session: requests.Session, file_id: str,
+                     outcomes: Dict[str, bool]) -> Tuple[Optional[str], Optional[requests.Response]]:
+    """
+    Race strategies and return (name, response) of the first to yield a non-HTML response
     
-    print(f"❌ Alternative domains failed")
+    The race is called off before the body is read: strategies not yet started never
+    start, and responses from ones still in flight are closed as they arrive.
+    """
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(strategies))
+    futures = {
+        executor.submit(_run_strategy, strategy, session, file_id, rank * _STRATEGY_STAGGER, stop): name
+        for rank, (name, strategy) in enumerate(strategies)
+    }
     
-    # Strategy 6: Multiple redirects and cookies
-    print(f"\n🔄 STRATEGY 6: Multiple redirects")
     try:
-        # Build up cookies by visiting multiple pages
-        session.get(f"https://drive.google.com", timeout=30)
-        session.get(f"https://drive.google.com/file/d/{file_id}/view", timeout=30)
-        session.get(f"https://drive.google.com/uc?id={file_id}", timeout=30)
+        for future in as_completed(futures):
+            name = futures.pop(future)
+            try:
+                response = future.result()
+            except Exception as e:
+                logger.warning(f"❌ {name} error: {e}")
+                outcomes[name] = False
+                continue
+            
+            if response is None:
+                logger.info(f"❌ {name} failed")
+                outcomes[name] = False
+                continue
+            
+            logger.info(f"✅ {name} won the race")
+            return name, response
         
-        # Final download attempt
-        final_url = f"https://drive.google.com/uc?export=download&id={file_id}&confirm=t"
-        response = session.get(final_url, stream=True, timeout=120, allow_redirects=True)
+        return None, None
+    
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
+            future.add_done_callback(_close_response_future)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _save_drive_response(name: str, response: requests.Response, destination_path: str,
+                         outcomes: Dict[str, bool]) -> bool:
+    """Stream a strategy's response to destination_path and record whether it verified"""
+    try:
+        with response:
+            _save_response_to_file(response, destination_path)
+    except (DownloadError, requests.exceptions.RequestException) as e:
+        logger.warning(f"❌ {name} download failed: {e}")
+        outcomes[name] = False
+        return False
+    
+    outcomes[name] = _verify_download(destination_path)
+    return outcomes[name]
+
+def _download_google_drive_file(file_id: str, destination_path: str,
+                                session: Optional[requests.Session] = None) -> bool:
+    """
+    Enhanced Google Drive download with multiple bypass strategies
+    
+    All strategies race concurrently, historically successful ones starting
+    first; the race is stopped as soon as one returns a non-HTML response,
+    and only then is that winner's body streamed to disk. Each strategy runs
+    on its own cookie jar (see _drive_session); session only supplies headers
+    and proxies. If the winner's body fails verification, the strategies the
+    race didn't settle are tried one at a time.
+    
+    Returns:
+        True if successful download, False otherwise
+    """
+    session = session or get_session()
+    strategies = _ranked_strategies()
+    
+    logger.info(f"🚀 ENHANCED GOOGLE DRIVE DOWNLOAD")
+    logger.info(f"🆔 File ID: {file_id}")
+    logger.info(f"💾 Destination: {destination_path}")
+    logger.info(f"🔄 Racing {len(strategies)} strategies: {', '.join(name for name, _ in strategies)}")
+    
+    outcomes = {}
+    try:
+        name, response = _race_strategies(strategies, session, file_id, outcomes)
+        if response is None:
+            return False
+        if _save_drive_response(name, response, destination_path, outcomes):
+            return True
         
-        if response.status_code == 200:
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                print(f"✅ Multiple redirects successful")
-                _save_response_to_file(response, destination_path)
-                return _verify_download(destination_path)
+        # Sequential fallback over strategies that lost the race without being tried to the end
+        for name, strategy in strategies:
+            if name in outcomes:
+                continue
+            logger.info(f"🔁 Falling back to {name}")
+            try:
+                response = strategy(_drive_session(session), file_id)
+            except Exception as e:
+                logger.warning(f"❌ {name} error: {e}")
+                outcomes[name] = False
+                continue
+            if response is None:
+                outcomes[name] = False
+                continue
+            if _save_drive_response(name, response, destination_path, outcomes):
+                return True
         
-        print(f"❌ Multiple redirects failed")
-    except Exception as e:
-        print(f"❌ Multiple redirects error: {e}")
+        return False
     
-    return False
+    finally:
+        _record_strategy_outcomes(outcomes)
 
 def _save_response_to_file(response: requests.Response, file_path: str) -> None:
-    """Save streaming response to file with progress"""
-    total_size = int(response.headers.get('content-length', 0))
-    downloaded = 0
-    
-    with open(file_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=1024*1024):  # 1MB chunks
-            if chunk:
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    percent = (downloaded / total_size) * 100
-                    print(f"   📥 Downloaded: {percent:.1f}% ({downloaded:,} / {total_size:,} bytes)", end='\\r')
-    
-    if total_size > 0:
-        print(f"   📥 Download complete: {downloaded:,} bytes")
+    """Save streaming response to file"""
+    # Let urllib3 undo any gzip/deflate transfer encoding while we read the raw stream
+    response.raw.decode_content = True
+    first = response.raw.read(_HEAD_PEEK_SIZE)
+    
+    # Check the head of the stream for an HTML page before anything touches disk, and
+    # drop the connection so the rest of the interstitial is never transferred
+    if _looks_like_html(first[:_HTML_SIGNATURE_WINDOW]):
+        response.close()
+        logger.warning(f"   ❌ Downloaded HTML instead of video content")
+        raise DownloadError("Server returned an HTML page instead of the file")
+    
+    with _open_scratch(file_path) as f:
+        try:
+            _preallocate(f, response)
+            f.write(first)
+            # Copy the rest in C with large reads, no per-chunk Python iterator
+            shutil.copyfileobj(response.raw, f, length=_chunk_sizer.chunk_size)
+            downloaded = _finish_scratch(f, file_path)
+        except BaseException:
+            _discard_scratch(f, file_path)
+            raise
+    
+    _chunk_sizer.record(downloaded)
+    logger.info(f"   📥 Download complete: {downloaded:,} bytes")
+
+def _open_scratch(file_path: str):
+    """
+    Open an unnamed O_TMPFILE inode in file_path's directory for writing
+    
+    Nothing is visible on disk until _link_scratch gives it a name, so a failed or
+    abandoned download disappears on close without any cleanup. Falls back to
+    opening file_path directly where O_TMPFILE isn't available.
+    """
+    flag = getattr(os, 'O_TMPFILE', 0)
+    if flag:
+        try:
+            fd = os.open(os.path.dirname(file_path) or '.', flag | os.O_RDWR, 0o600)
+            return os.fdopen(fd, 'wb')
+        except OSError:
+            # Filesystem without O_TMPFILE support (EOPNOTSUPP/EISDIR/EINVAL)
+            pass
+    return open(file_path, 'wb')
+
+def _finish_scratch(f, file_path: str) -> int:
+    """Trim a fully written scratch file to its end, link it in as file_path and return its size"""
+    downloaded = f.tell()
+    # Drop any reserved space past the real end of the body
+    f.truncate()
+    f.flush()
+    _link_scratch(f, file_path)
+    return downloaded
+
+def _discard_scratch(f, file_path: str) -> None:
+    """Drop a failed download: unnamed inodes vanish on close, the fallback file is removed"""
+    f.close()
+    if f.name == file_path:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+def _link_scratch(f, file_path: str) -> None:
+    """Give a completed O_TMPFILE download its name, replacing any existing file_path"""
+    # Regular files (fallback path) already carry their name; fdopen'd inodes are named by their fd
+    if f.name == file_path:
+        return
+    source = f"/proc/self/fd/{f.fileno()}"
+    os.fchmod(f.fileno(), 0o644)
+    staging = f"{file_path}.{uuid.uuid4().hex}.part"
+    try:
+        # linkat can't overwrite - link beside the target and swap atomically
+        os.link(source, staging, follow_symlinks=True)
+    except OSError:
+        # Restricted /proc (EXDEV/EPERM/ENOENT) - copy the inode out instead
+        with open(source, 'rb') as src, open(staging, 'wb') as dst:
+            shutil.copyfileobj(src, dst, length=_CHUNK_SIZE)
+    os.replace(staging, file_path)
+
+def _preallocate(f, response: requests.Response) -> None:
+    """Reserve the full file size up front when Content-Length is known, for contiguous extents"""
+    if not hasattr(os, 'posix_fallocate'):
+        return
+    # With a content encoding, Content-Length is the compressed size, not the file size
+    if response.headers.get('content-encoding', 'identity').lower() != 'identity':
+        return
+    try:
+        total_size = int(response.headers.get('content-length', 0))
+        if total_size > 0:
+            os.posix_fallocate(f.fileno(), 0, total_size)
+    except (ValueError, OSError):
+        # Filesystem without fallocate support (or bad header) - just write normally
+        pass
+
+def _looks_like_html(head: bytes) -> bool:
+    """Check the first bytes of a download for an HTML page (e.g. Drive's virus scan warning)"""
+    head = head.lower()
+    return b'<html' in head or b'<!doctype' in head or b'virus scan warning' in head
 
 def _verify_download(file_path: str) -> bool:
-    """Verify downloaded file is valid (not HTML)"""
+    """Verify downloaded file is valid (HTML pages are rejected while streaming)"""
     try:
-        if not os.path.exists(file_path):
-            return False
-        
-        file_size = os.path.getsize(file_path)
-        if file_size < 1000:  # Too small to be a valid video
-            return False
-        
-        # Check if it's HTML content
-        with open(file_path, 'rb') as f:
-            first_bytes = f.read(1000).lower()
-            if b'<html' in first_bytes or b'<!doctype' in first_bytes or b'virus scan warning' in first_bytes:
-                print(f"   ❌ Downloaded HTML instead of video content")
-                return False
-        
-        print(f"   ✅ Verified: Valid video file ({file_size:,} bytes)")
-        return True
-        
+        file_size = os.stat(file_path).st_size
+    except FileNotFoundError:
+        return False
     except Exception as e:
-        print(f"   ❌ Verification error: {e}")
+        logger.warning(f"   ❌ Verification error: {e}")
         return False
+    
+    if file_size < 1000:  # Too small to be a valid video
+        return False
+    
+    logger.info(f"   ✅ Verified: Valid video file ({file_size:,} bytes)")
+    return True
+
+def _ensure_dir(path: str) -> None:
+    """Create path if missing: one mkdir when it already exists, instead of makedirs' extra stats"""
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        # Missing parents - rare, let makedirs build the chain
+        os.makedirs(path, exist_ok=True)
+
+def _destination_path(url: str, destination_dir: str, filename: Optional[str] = None) -> str:
+    """Create destination_dir and return the path to save url to (filename generated if not provided)"""
+    _ensure_dir(destination_dir)
+    
+    # Generate filename if not provided
+    if not filename:
+        parsed_url = urlparse(url)
+        url_filename = os.path.basename(parsed_url.path)
+        
+        if url_filename and '.' in url_filename:
+            filename = url_filename
+        else:
+            file_extension = _guess_extension_from_url(url)
+            filename = f"{str(uuid.uuid4())}{file_extension}"
+    
+    # Full path for the downloaded file
+    return os.path.join(destination_dir, filename)
 
 def download_file(url: str, destination_dir: str, filename: Optional[str] = None) -> str:
     """
@@ -252,26 +662,11 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
         DownloadError: If download fails
     """
     try:
-        # Create destination directory if it doesn't exist
-        os.makedirs(destination_dir, exist_ok=True)
-        
-        # Generate filename if not provided
-        if not filename:
-            parsed_url = urlparse(url)
-            url_filename = os.path.basename(parsed_url.path)
-            
-            if url_filename and '.' in url_filename:
-                filename = url_filename
-            else:
-                file_extension = _guess_extension_from_url(url)
-                filename = f"{str(uuid.uuid4())}{file_extension}"
-        
-        # Full path for the downloaded file
-        file_path = os.path.join(destination_dir, filename)
+        file_path = _destination_path(url, destination_dir, filename)
         
         # Handle Google Drive URLs with enhanced strategies
         if _is_google_drive_url(url):
-            print(f"🟢 GOOGLE DRIVE DETECTED: {url}")
+            logger.info(f"🟢 GOOGLE DRIVE DETECTED: {url}")
             
             file_id = _extract_google_drive_file_id(url)
             if not file_id:
@@ -281,17 +676,18 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
             success = _download_google_drive_file(file_id, file_path)
             
             if success:
-                print(f"✅ ENHANCED GOOGLE DRIVE DOWNLOAD SUCCESSFUL!")
+                logger.info(f"✅ ENHANCED GOOGLE DRIVE DOWNLOAD SUCCESSFUL!")
                 return file_path
             else:
                 raise DownloadError("All Google Drive download strategies failed")
         
         # Handle non-Google Drive URLs (original logic)
-        print(f"🔽 DOWNLOADING: {url}")
-        response = requests.get(url, stream=True, timeout=300)
+        logger.info(f"🔽 DOWNLOADING: {url}")
+        response = _get(get_session(), url, stream=True, timeout=300)
         response.raise_for_status()
         
-        _save_response_to_file(response, file_path)
+        with response:
+            _save_response_to_file(response, file_path)
         
         if not _verify_download(file_path):
             raise DownloadError("Downloaded file verification failed")
@@ -303,21 +699,43 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
     except Exception as e:
         raise DownloadError(f"Error downloading file: {str(e)}")
 
-def _guess_extension_from_url(url: str) -> str:
-    """Guess file extension from URL"""
-    parsed_url = urlparse(url)
-    path = parsed_url.path.lower() if parsed_url.path else ""
+def download_files(urls: List[str], destination_dir: str, filenames: Optional[List[str]] = None,
+                   max_workers: int = 4) -> List[str]:
+    """
+    Download several files concurrently (e.g. the inputs of a join job)
     
-    video_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm']
-    audio_extensions = ['.mp3', '.wav', '.aac', '.ogg', '.flac', '.m4a']
+    Args:
+        urls: URLs of the files to download
+        destination_dir: Directory to save the files
+        filenames: Optional filenames, one per URL
+        max_workers: Maximum number of simultaneous downloads
+        
+    Returns:
+        Paths to the downloaded files, in the same order as urls
+        
+    Raises:
+        DownloadError: If any download fails
+    """
+    filenames = filenames or [None] * len(urls)
+    if len(urls) <= 1:
+        return [download_file(url, destination_dir, name) for url, name in zip(urls, filenames)]
     
-    for ext in video_extensions + audio_extensions:
-        if path and path.endswith(ext):
-            return ext
+    # Downloads are network-bound and requests releases the GIL on socket reads
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        futures = [executor.submit(download_file, url, destination_dir, name) for url, name in zip(urls, filenames)]
+        return [future.result() for future in futures]
+
+@lru_cache(maxsize=4096)
+def _guess_extension_from_url(url: str) -> str:
+    """Guess file extension from URL"""
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext in _KNOWN_EXTENSIONS:
+        return ext
     
-    if any(keyword in url.lower() for keyword in ['video', 'mp4', 'avi', 'mov']):
+    url_lower = url.lower()
+    if _VIDEO_KEYWORDS_RE.search(url_lower):
         return '.mp4'
-    elif any(keyword in url.lower() for keyword in ['audio', 'music', 'mp3', 'sound']):
+    elif _AUDIO_KEYWORDS_RE.search(url_lower):
         return '.mp3'
     
     return '.mp4'
@@ -326,22 +744,52 @@ def _guess_extension_from_url(url: str) -> str:
 def cleanup_temp_file(file_path: str) -> bool:
     """Clean up a temporary file."""
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"Cleaned up temporary file: {file_path}")
-            return True
+        os.remove(file_path)
+    except FileNotFoundError:
         return False
     except Exception as e:
-        print(f"Error cleaning up file {file_path}: {str(e)}")
+        logger.error(f"Error cleaning up file {file_path}: {str(e)}")
         return False
+    
+    logger.info(f"Cleaned up temporary file: {file_path}")
+    return True
 
 def get_file_size(file_path: str) -> int:
     """Get file size in bytes."""
     try:
-        return os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        return os.stat(file_path).st_size
     except Exception:
         return 0
 
+def _ttl_cache(maxsize: int = 1024, ttl: float = 300.0):
+    """Thread-safe memoization of a single-argument function with entries expiring after ttl seconds"""
+    def decorator(fn):
+        cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        lock = threading.Lock()
+        
+        @wraps(fn)
+        def wrapper(key):
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[0] > now:
+                    cache.move_to_end(key)
+                    return entry[1]
+            
+            # Compute outside the lock so concurrent checks of different URLs don't serialize
+            value = fn(key)
+            with lock:
+                cache[key] = (now + ttl, value)
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+        
+        wrapper.cache_clear = lambda: cache.clear()
+        return wrapper
+    return decorator
+
+@_ttl_cache(maxsize=1024, ttl=300)
 def is_valid_url(url: str) -> bool:
     """Check if URL is valid and accessible."""
     try:
@@ -349,8 +797,16 @@ def is_valid_url(url: str) -> bool:
         if not parsed.scheme or not parsed.netloc:
             return False
         
-        response = requests.head(url, timeout=10)
+        response = get_session().head(url, timeout=10, allow_redirects=True)
         return response.status_code < 400
         
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+def validate_urls(urls: List[str]) -> List[bool]:
+    """Check several URLs concurrently over the shared session; results follow the order of urls."""
+    if not urls:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=min(16, len(urls))) as executor:
+        return list(executor.map(is_valid_url, urls))
\ No newline at end of file
@@ -1,13 +1,34 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import uuid
 import re
+import shutil
 from urllib.parse import urlparse
 from typing import Optional
 
 class DownloadError(Exception):
     pass
 
+# Precompiled Google Drive patterns
+_DRIVE_HOST_RE = re.compile(r'drive\.google\.com|docs\.google\.com|googleapis\.com', re.IGNORECASE)
+_DRIVE_ID_PATTERNS = [re.compile(p) for p in (
+    r'/file/d/([a-zA-Z0-9_-]+)',
+    r'id=([a-zA-Z0-9_-]+)',
+    r'/d/([a-zA-Z0-9_-]+)',
+)]
+_DRIVE_LINK_PATTERNS = [re.compile(p) for p in (
+    r'href="(/uc\?export=download[^"]*)"',
+    r'"downloadUrl":"([^"]*)"',
+    r'href="(https://drive\.google\.com/uc\?export=download[^"]*)"',
+)]
+
+# Shared session so repeated downloads reuse pooled connections
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+_session.mount('http://', _adapter)
+_session.mount('https://', _adapter)
+
 def _is_valid_content_type(content_type: str, file_path: str, is_google_drive: bool = False) -> bool:
     if not content_type:
         return True
@@ -23,22 +44,12 @@ def _is_valid_content_type(content_type: str, file_path: str, is_google_drive: b
 
 def _is_google_drive_url(url: str) -> bool:
     """Check if URL is a Google Drive URL."""
-    return any(domain in url.lower() for domain in [
-        'drive.google.com', 
-        'docs.google.com',
-        'googleapis.com'
-    ])
+    return _DRIVE_HOST_RE.search(url) is not None
 
 def _extract_google_drive_file_id(url: str) -> Optional[str]:
     """Extract file ID from various Google Drive URL formats"""
-    patterns = [
-        r'/file/d/([a-zA-Z0-9_-]+)',
-        r'id=([a-zA-Z0-9_-]+)',
-        r'/d/([a-zA-Z0-9_-]+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _DRIVE_ID_PATTERNS:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     return None
@@ -96,7 +107,7 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
         
         # Download the file
         print(f"🔽 Downloading: {url}")
-        response = requests.get(url, stream=True, timeout=300)
+        response = _session.get(url, stream=True, timeout=300)
         
         # Debug response info
         print(f"📊 Response status: {response.status_code}")
@@ -109,19 +120,15 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
             # For Google Drive, we might get HTML even with 200 status
             # Check the content to see if it's actually the virus scan page
             if is_google_drive and 'text/html' in content_type.lower():
-                # Try to extract the actual download link from the HTML
-                html_content = response.text
+                # Try to extract the actual download link from the start of the HTML;
+                # the confirmation link sits near the top, so don't buffer the whole page
+                html_content = next(response.iter_content(16384), b'').decode('utf-8', errors='ignore')
+                response.close()
                 
                 # Look for download confirmation link
-                download_link_patterns = [
-                    r'href="(/uc\?export=download[^"]*)"',
-                    r'"downloadUrl":"([^"]*)"',
-                    r'href="(https://drive\.google\.com/uc\?export=download[^"]*)"'
-                ]
-                
                 download_link = None
-                for pattern in download_link_patterns:
-                    matches = re.findall(pattern, html_content)
+                for pattern in _DRIVE_LINK_PATTERNS:
+                    matches = pattern.findall(html_content)
                     if matches:
                         download_link = matches[0]
                         if download_link.startswith('/'):
@@ -130,12 +137,14 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
                         print(f"🔗 Found download link: {download_link}")
                         break
                 
-                if download_link:
-                    print(f"🔄 Retrying with extracted link...")
-                    response = requests.get(download_link, stream=True, timeout=300)
-                    print(f"📊 Retry response status: {response.status_code}")
-                    content_type = response.headers.get('content-type', 'unknown')
-                    print(f"📋 Retry content type: {content_type}")
+                if not download_link:
+                    raise DownloadError("Google Drive returned an HTML page without a download link")
+                
+                print(f"🔄 Retrying with extracted link...")
+                response = _session.get(download_link, stream=True, timeout=300)
+                print(f"📊 Retry response status: {response.status_code}")
+                content_type = response.headers.get('content-type', 'unknown')
+                print(f"📋 Retry content type: {content_type}")
         
         response.raise_for_status()
         
@@ -145,11 +154,10 @@ def download_file(url: str, destination_dir: str, filename: Optional[str] = None
         elif not _is_valid_content_type(content_type, file_path, is_google_drive):
             raise DownloadError(f"Invalid content type: {content_type}")
         
-        # Save the file
+        # Save the file, copying in C with 1 MiB reads
+        response.raw.decode_content = True
         with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+            shutil.copyfileobj(response.raw, f, length=1024 * 1024)
         
         # Verify the downloaded file
         file_size = os.path.getsize(file_path)
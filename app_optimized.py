@@ -1,22 +1,34 @@
 from flask import Flask, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import orjson
+import msgspec
 import os
 import uuid
 import threading
+import atexit
+import signal
 import time
 import gc
+import ctypes
 import psutil
 import logging
 from concurrent.futures import ThreadPoolExecutor
 import json
+import mimetypes
 from datetime import datetime
 import re
+from collections import deque, namedtuple
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Annotated, Any, Dict, List, Optional, Union
 
 # Import optimized services
 from app.services.optimized_video_service import OptimizedVideoService
 from app.services.optimized_subtitle_service import OptimizedSubtitleService
 from app.services.job_manager import JobManager
 from app.utils.download_utils import download_file
+from app.utils.async_download_utils import download_files_sync
 
 # Configure logging for performance monitoring
 logging.basicConfig(
@@ -29,7 +41,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so jsonify and request.get_json skip the stdlib encoder."""
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option), mimetype=self.mimetype
+        )
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Initialize optimized services
@@ -37,16 +67,187 @@ video_service = OptimizedVideoService()
 subtitle_service = OptimizedSubtitleService()
 job_manager = JobManager()
 
+# Job scratch files; point TEMP_DIR at a tmpfs mount (e.g. /dev/shm/veapi) on hosts with RAM to spare
+TEMP_DIR = os.environ.get('TEMP_DIR', 'temp')
+
+# Create necessary directories at import, so they exist under gunicorn too
+for directory in (TEMP_DIR, 'uploads', 'jobs'):
+    try:
+        os.mkdir(directory)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(directory, exist_ok=True)  # e.g. TEMP_DIR nested under a fresh mount
+
+# Per-job temp file names, formatted with the job id
+_JOB_FILE_TEMPLATES = {
+    'input': '{job_id}_input.mp4',
+    'output': '{job_id}_output.mp4',
+    'subtitle': '{job_id}_subtitles.srt',
+    'split': '{job_id}_split.mp4',
+    'joined': '{job_id}_joined.mp4',
+    'video': '{job_id}_video.mp4',
+    'music': '{job_id}_music.mp3',
+    'with_music': '{job_id}_with_music.mp4',
+}
+
+@dataclass(slots=True, frozen=True)
+class JobPaths:
+    """Temp file paths of one job, built once from its id."""
+    job_id: str
+    input: str
+    output: str
+    subtitle: str
+    split: str
+    joined: str
+    video: str
+    music: str
+    with_music: str
+    
+    @classmethod
+    def from_id(cls, job_id):
+        values = {'job_id': job_id}
+        return cls(job_id, **{
+            field: os.path.join(TEMP_DIR, template.format_map(values))
+            for field, template in _JOB_FILE_TEMPLATES.items()
+        })
+    
+    def joined_input(self, index):
+        """Path of the index-th downloaded input of a join job."""
+        return os.path.join(TEMP_DIR, f"{self.job_id}_input_{index}.mp4")
+
+# Job ids are cut from one os.urandom read per batch instead of one read per uuid4()
+UUID_BATCH_SIZE = 64
+_uuid_pool = []
+_uuid_lock = threading.Lock()
+
+def next_job_id():
+    """Return a random (version 4) UUID string for a new job."""
+    with _uuid_lock:
+        if not _uuid_pool:
+            buf = bytearray(os.urandom(16 * UUID_BATCH_SIZE))
+            for offset in range(0, len(buf), 16):
+                buf[offset + 6] = (buf[offset + 6] & 0x0f) | 0x40  # Version 4
+                buf[offset + 8] = (buf[offset + 8] & 0x3f) | 0x80  # RFC 4122 variant
+                _uuid_pool.append(str(uuid.UUID(bytes=bytes(buf[offset:offset + 16]))))
+        return _uuid_pool.pop()
+
+# Optimized default settings for low-resource systems (read-only; copied per request)
+DEFAULT_STYLE_SETTINGS = MappingProxyType({
+    "font-size": 80,  # Smaller font for memory efficiency
+    "font-family": "DejaVu-Sans-Bold",  # Simple font
+    "line-color": "#FFF4E9", 
+    "outline-width": 5,  # Reduced outline for performance
+    "normal-color": "#FFFFFF"
+})
+
+# Request bodies, decoded and validated in one pass by msgspec (400 on DecodeError)
+class AddSubtitlesRequest(msgspec.Struct):
+    url: str
+    language: str = "en"
+    return_subtitles_file: bool = True
+    word_level_mode: str = "karaoke"
+    timing_offset: float = 0.0
+    settings: Dict[str, Any] = {}
+    word_level_settings: Dict[str, Any] = {}
+
+class SplitVideoRequest(msgspec.Struct):
+    start_time: Union[str, float]
+    end_time: Union[str, float]
+    url: Optional[str] = None
+    job_id: Optional[str] = None
+    
+    def __post_init__(self):
+        if self.url is None and self.job_id is None:
+            raise ValueError("Must provide either 'url' or 'job_id'")
+        if self.url is not None and self.job_id is not None:
+            raise ValueError("Provide either 'url' or 'job_id', not both")
+
+class JoinVideosRequest(msgspec.Struct):
+    urls: Annotated[List[str], msgspec.Meta(min_length=2)]
+
+class AddMusicRequest(msgspec.Struct):
+    video_url: str
+    music_url: str
+    volume: float = 0.5
+    fade_in: float = 0
+    fade_out: float = 0
+    loop_music: bool = False
+
+def decode_request(request_type):
+    """Decode the request body into request_type; raises msgspec.DecodeError when invalid."""
+    return msgspec.json.decode(request.get_data(), type=request_type)
+
+def invalid_request_response(error):
+    return jsonify({"error": f"Invalid request: {error}"}), 400
+
 # Resource monitoring configuration
 MEMORY_WARNING_THRESHOLD = 0.85  # 85%
 MEMORY_CRITICAL_THRESHOLD = 0.95  # 95%
 CPU_WARNING_THRESHOLD = 0.90      # 90%
 
+# Memory reading with the psutil.virtual_memory() fields the app uses (percent is 0-100)
+MemoryReading = namedtuple('MemoryReading', ['total', 'available', 'percent'])
+
+try:
+    # Kept open for the life of the process; each reading is a single pread at offset 0
+    _MEMINFO_FD = os.open('/proc/meminfo', os.O_RDONLY)
+except OSError:
+    _MEMINFO_FD = None
+
+def _meminfo_kb(data, key):
+    """Value in bytes of a 'Key:   123 kB' line of /proc/meminfo."""
+    start = data.index(key) + len(key)
+    return int(data[start:data.index(b'kB', start)]) * 1024
+
+def _open_cgroup_memory():
+    """(memory.current fd, memory.stat fd, limit) of this cgroup v2 group, or None without a memory limit."""
+    try:
+        with open('/sys/fs/cgroup/memory.max', 'rb') as f:
+            limit = f.read().strip()
+        if limit == b'max':
+            return None
+        return (os.open('/sys/fs/cgroup/memory.current', os.O_RDONLY),
+                os.open('/sys/fs/cgroup/memory.stat', os.O_RDONLY), int(limit))
+    except (OSError, ValueError):
+        # Not Linux, cgroup v1, or not in a limited container
+        return None
+
+def _read_cgroup_memory(cgroup):
+    """MemoryReading against the container's limit; reclaimable page cache doesn't count as used."""
+    current_fd, stat_fd, limit = cgroup
+    stat = os.pread(stat_fd, 4096, 0)
+    start = stat.index(b'\ninactive_file ') + len(b'\ninactive_file ')
+    used = max(0, int(os.pread(current_fd, 32, 0)) - int(stat[start:stat.index(b'\n', start)]))
+    return MemoryReading(limit, max(0, limit - used), used / limit * 100)
+
+def read_memory():
+    """Current memory usage from /proc/meminfo, without building psutil's full tuple (psutil elsewhere)."""
+    if _CGROUP_MEMORY is not None:
+        return _read_cgroup_memory(_CGROUP_MEMORY)
+    if _MEMINFO_FD is None:
+        return psutil.virtual_memory()
+    
+    # MemTotal and MemAvailable are the first and third lines
+    data = os.pread(_MEMINFO_FD, 512, 0)
+    available = _meminfo_kb(data, b'MemAvailable:')
+    return MemoryReading(_MEMTOTAL, available, (_MEMTOTAL - available) / _MEMTOTAL * 100)
+
+# Fixed for the life of the process, so read once
+_MEMTOTAL = _meminfo_kb(os.pread(_MEMINFO_FD, 512, 0), b'MemTotal:') if _MEMINFO_FD is not None else None
+# Inside a memory-limited container, pressure is measured against the limit, not the host
+_CGROUP_MEMORY = _open_cgroup_memory()
+if _CGROUP_MEMORY is not None and _MEMTOTAL is not None and _CGROUP_MEMORY[2] >= _MEMTOTAL:
+    _CGROUP_MEMORY = None  # Limit above host RAM - the host figures are the binding ones
+TOTAL_MEMORY_GB = read_memory().total / (1024**3)
+# CPUs this process may run on (container cpusets included), not every core on the host
+CPU_COUNT = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else psutil.cpu_count() or 1
+
 # Adaptive worker configuration based on system resources
 def get_optimal_worker_count():
     """Determine optimal worker count based on system resources."""
-    memory_gb = psutil.virtual_memory().total / (1024**3)
-    cpu_count = psutil.cpu_count()
+    memory_gb = TOTAL_MEMORY_GB
+    cpu_count = CPU_COUNT
     
     # Conservative worker allocation for resource-constrained systems
     if memory_gb <= 4:  # 4GB or less
@@ -56,48 +257,201 @@ def get_optimal_worker_count():
     else:  # 8GB+
         return min(4, cpu_count)
 
+# Adaptive worker limits: grow only while smoothed usage stays below these ratios
+MAX_USED_CPU_RATIO = 0.50
+MAX_USED_MEMORY_RATIO = 0.60
+WORKER_EWMA_ALPHA = 0.3        # Weight of the newest sample in the smoothed ratios
+WORKER_GROW_AFTER_SECONDS = 30  # Sustained headroom required before adding a worker
+
+class AdaptiveExecutor:
+    """Thread pool whose effective concurrency tracks smoothed CPU and memory pressure."""
+    
+    def __init__(self, initial_workers, max_workers):
+        self.limit = initial_workers
+        self.base_limit = initial_workers  # Memory-based sizing the limit settles back to when idle
+        self.max_workers = max_workers
+        self.active = 0
+        self.cpu_ratio = 0.0
+        self.memory_ratio = 0.0
+        self._headroom_since = None
+        self._closing = False
+        self._slots = threading.Condition()
+        # Threads are created lazily; jobs beyond the current limit wait for a slot
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+    
+    def submit(self, fn, *args, **kwargs):
+        def run():
+            with self._slots:
+                while self.active >= self.limit and not self._closing:
+                    self._slots.wait()
+                if self._closing:
+                    return None  # Shutting down - drop jobs still waiting for a slot
+                self.active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._slots:
+                    self.active -= 1
+                    self._slots.notify()
+        
+        return self._executor.submit(run)
+    
+    def overloaded(self):
+        """True when memory is under pressure and every slot is busy, so new jobs should be refused."""
+        return self.memory_ratio > MEMORY_WARNING_THRESHOLD and self.active >= self.limit
+    
+    def observe(self, cpu_ratio, memory_ratio):
+        """Fold in a resource sample and shrink or grow the worker limit."""
+        self.cpu_ratio += WORKER_EWMA_ALPHA * (cpu_ratio - self.cpu_ratio)
+        self.memory_ratio += WORKER_EWMA_ALPHA * (memory_ratio - self.memory_ratio)
+        now = time.monotonic()
+        
+        with self._slots:
+            if self.memory_ratio > MEMORY_WARNING_THRESHOLD and self.active > 1:
+                self._headroom_since = None
+                if self.limit > 1:
+                    self.limit -= 1
+                    logger.warning(f"Memory pressure {self.memory_ratio:.1%}: worker limit lowered to {self.limit}")
+            elif self.active == 0:
+                # No demand: don't accumulate headroom, and drift back to the memory-based sizing
+                self._headroom_since = None
+                if self.limit > self.base_limit:
+                    self.limit -= 1
+                    logger.info(f"Pool idle: worker limit lowered to {self.limit}")
+                elif self.limit < self.base_limit and self.memory_ratio < MAX_USED_MEMORY_RATIO:
+                    self.limit += 1
+                    logger.info(f"Pool idle: worker limit restored to {self.limit}")
+            elif (self.active >= self.limit and self.cpu_ratio < MAX_USED_CPU_RATIO
+                    and self.memory_ratio < MAX_USED_MEMORY_RATIO):
+                # Every slot busy with resources to spare - grow only under real demand
+                if self._headroom_since is None:
+                    self._headroom_since = now
+                elif now - self._headroom_since >= WORKER_GROW_AFTER_SECONDS and self.limit < self.max_workers:
+                    self.limit += 1
+                    self._headroom_since = now
+                    self._slots.notify()
+                    logger.info(f"All workers busy with resources to spare: worker limit raised to {self.limit}")
+            else:
+                self._headroom_since = None
+    
+    def shutdown(self, wait=True, cancel_futures=False):
+        if cancel_futures:
+            with self._slots:
+                self._closing = True
+                self._slots.notify_all()
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
 # Thread pool for async processing with adaptive sizing
-optimal_workers = get_optimal_worker_count()
-logger.info(f"Initializing with {optimal_workers} workers for {psutil.virtual_memory().total/(1024**3):.1f}GB system")
-executor = ThreadPoolExecutor(max_workers=optimal_workers)
+OPTIMAL_WORKERS = get_optimal_worker_count()
+executor = AdaptiveExecutor(OPTIMAL_WORKERS, 2 * CPU_COUNT)
+logger.info("Initializing with %d workers for %.1fGB system", executor.limit, TOTAL_MEMORY_GB)
+
+def overloaded_response():
+    """503 response for job endpoints while the worker pool is saturated under memory pressure."""
+    return jsonify({
+        "error": "Server is at capacity. Please try again later.",
+        "memory_usage": f"{executor.memory_ratio:.1%}",
+        "workers": executor.limit
+    }), 503
 
 # Resource monitoring thread
-monitoring_active = True
+MONITOR_INTERVAL_SECONDS = 5
+shutdown_event = threading.Event()  # Set once when the process starts shutting down
+monitor_resample = threading.Event()  # Set to take the next sample immediately
 resource_stats = {
     "peak_memory": 0,
     "average_cpu": 0,
     "job_count": 0,
-    "warnings": []
+    "warnings": deque(maxlen=100)  # Keep only last 100 warnings
 }
 
+def performance_stats():
+    """JSON-serializable copy of resource_stats."""
+    return {**resource_stats, "warnings": list(resource_stats["warnings"])}
+
+# Latest (timestamp, memory reading, cpu_percent) sample, replaced as a whole tuple
+ResourceSnapshot = namedtuple('ResourceSnapshot', ['taken_at', 'memory', 'cpu_percent'])
+_last_snapshot = None
+
+def publish_resources(memory, cpu_percent):
+    """Publish a fresh resource sample for request handlers."""
+    global _last_snapshot
+    _last_snapshot = ResourceSnapshot(time.monotonic(), memory, cpu_percent)
+    return _last_snapshot
+
+def get_cached_resources(max_age=1.0):
+    """Return a resource snapshot no older than max_age seconds, sampling only when stale (a 1 s floor by default)."""
+    snapshot = _last_snapshot
+    if snapshot is not None and time.monotonic() - snapshot.taken_at <= max_age:
+        return snapshot
+    return publish_resources(read_memory(), psutil.cpu_percent())
+
+def read_cpu_times():
+    """(busy, total) jiffies from the aggregate /proc/stat line, or None where it doesn't exist."""
+    try:
+        with open('/proc/stat', 'rb') as f:
+            fields = f.readline().split()[1:8]
+    except OSError:
+        return None
+    
+    # user nice system idle iowait irq softirq
+    times = [int(x) for x in fields]
+    total = sum(times)
+    return total - times[3] - times[4], total
+
+class CpuSampler:
+    """CPU usage ratio since the previous sample, from /proc/stat deltas (psutil elsewhere)."""
+    
+    def __init__(self):
+        self._last = read_cpu_times()
+        if self._last is None:
+            psutil.cpu_percent(interval=None)  # Prime the non-blocking counter
+    
+    def sample(self):
+        current = read_cpu_times()
+        if current is None:
+            return psutil.cpu_percent(interval=None) / 100.0
+        
+        busy = current[0] - self._last[0]
+        total = current[1] - self._last[1]
+        self._last = current
+        return busy / total if total > 0 else 0.0
+
 def monitor_system_resources():
     """Background thread to monitor system resources."""
-    global monitoring_active, resource_stats
+    global resource_stats
     
-    cpu_samples = []
+    cpu_samples = deque(maxlen=60)  # Keep last 60 samples (1 minute)
+    cpu_sum = 0.0  # Running sum of cpu_samples
+    cpu_sampler = CpuSampler()
     
-    while monitoring_active:
+    while not shutdown_event.is_set():
         try:
             # Memory monitoring
-            memory = psutil.virtual_memory()
+            memory = read_memory()
             memory_percent = memory.percent / 100.0
             
             # CPU monitoring
-            cpu_percent = psutil.cpu_percent(interval=1) / 100.0
+            cpu_percent = cpu_sampler.sample()
+            publish_resources(memory, cpu_percent * 100)
+            if len(cpu_samples) == cpu_samples.maxlen:
+                cpu_sum -= cpu_samples[0]  # About to be evicted by append
             cpu_samples.append(cpu_percent)
-            if len(cpu_samples) > 60:  # Keep last 60 samples (1 minute)
-                cpu_samples.pop(0)
+            cpu_sum += cpu_percent
             
             # Update stats
             resource_stats["peak_memory"] = max(resource_stats["peak_memory"], memory_percent)
-            resource_stats["average_cpu"] = sum(cpu_samples) / len(cpu_samples)
+            resource_stats["average_cpu"] = cpu_sum / len(cpu_samples)
+            
+            # Adapt the worker limit to current pressure
+            executor.observe(cpu_percent, memory_percent)
             
             # Check for warning conditions
             if memory_percent > MEMORY_CRITICAL_THRESHOLD:
                 warning = f"CRITICAL: Memory usage {memory_percent:.1%} - triggering cleanup"
                 logger.critical(warning)
                 resource_stats["warnings"].append({
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": datetime.now(),
                     "type": "memory_critical",
                     "value": memory_percent,
                     "message": warning
@@ -109,7 +463,7 @@ def monitor_system_resources():
                 warning = f"WARNING: High memory usage {memory_percent:.1%}"
                 logger.warning(warning)
                 resource_stats["warnings"].append({
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": datetime.now(),
                     "type": "memory_warning", 
                     "value": memory_percent,
                     "message": warning
@@ -119,27 +473,45 @@ def monitor_system_resources():
                 warning = f"WARNING: High CPU usage {cpu_percent:.1%}"
                 logger.warning(warning)
                 resource_stats["warnings"].append({
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": datetime.now(),
                     "type": "cpu_warning",
                     "value": cpu_percent,
                     "message": warning
                 })
             
-            # Keep only last 100 warnings
-            if len(resource_stats["warnings"]) > 100:
-                resource_stats["warnings"] = resource_stats["warnings"][-100:]
-            
         except Exception as e:
             logger.error(f"Resource monitoring error: {e}")
         
-        time.sleep(5)  # Check every 5 seconds
+        # Check every 5 seconds, or sooner when a resample is requested
+        monitor_resample.wait(MONITOR_INTERVAL_SECONDS)
+        monitor_resample.clear()
+
+# Fewer automatic collections while video processing allocates heavily (default 700/10/10)
+gc.set_threshold(10000, 25, 25)
+
+try:
+    _libc = ctypes.CDLL("libc.so.6")
+except OSError:
+    _libc = None  # Not glibc - malloc_trim unavailable
+
+def release_freed_memory():
+    """Return freed malloc arenas to the OS (glibc only)."""
+    if _libc is not None:
+        _libc.malloc_trim(0)
+
+def collect_garbage():
+    """Collect young generations first, escalating only while memory stays above the warning level."""
+    for generation in (0, 1, 2):
+        gc.collect(generation)
+        if read_memory().percent <= MEMORY_WARNING_THRESHOLD * 100:
+            break
 
 def emergency_cleanup():
     """Emergency memory cleanup when critical threshold is reached."""
     logger.info("Performing emergency memory cleanup...")
     
-    # Force garbage collection
-    gc.collect()
+    # Tiered garbage collection
+    collect_garbage()
     
     # Unload Whisper model if loaded
     try:
@@ -152,35 +524,119 @@ def emergency_cleanup():
         video_service._cleanup_memory()
     except Exception as e:
         logger.error(f"Error cleaning video service: {e}")
+    
+    # Hand the memory freed above back to the OS
+    release_freed_memory()
+
+# Running jobs get this long to finish on shutdown before the process is force-exited
+# (below gunicorn's graceful_timeout, so the worker exits before it is SIGKILLed)
+SHUTDOWN_GRACE_SECONDS = 10
+_shutdown_lock = threading.Lock()
+
+def stop_monitor():
+    """Stop the monitor thread without waiting out its sleep."""
+    shutdown_event.set()
+    monitor_resample.set()
+
+SHUTDOWN_ERROR_MESSAGE = "Server shut down before the job finished"
+
+def force_exit():
+    """Shutdown watchdog: record the jobs the drain didn't finish as failed, then exit non-zero."""
+    try:
+        failed = job_manager.fail_unfinished_jobs(SHUTDOWN_ERROR_MESSAGE)
+        logger.error(f"Shutdown grace period expired; {failed} unfinished jobs marked failed")
+    finally:
+        os._exit(1)
+
+def shutdown_services():
+    """Stop background work and release the Whisper model, bounded by SHUTDOWN_GRACE_SECONDS."""
+    with _shutdown_lock:
+        if shutdown_event.is_set():
+            return
+        stop_monitor()
+    
+    watchdog = threading.Timer(SHUTDOWN_GRACE_SECONDS, force_exit)
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        # Drop the service's model reference while queued jobs are cancelled and running
+        # ones drain; jobs hold their own reference, so memory frees as the last one ends
+        unloader = threading.Thread(target=subtitle_service.unload_model, daemon=True)
+        unloader.start()
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Queued jobs dropped by the drain would otherwise stay "queued" forever
+        job_manager.fail_unfinished_jobs(SHUTDOWN_ERROR_MESSAGE)
+        unloader.join(timeout=5)
+    finally:
+        watchdog.cancel()
+
+def preload_subtitle_model():
+    """Warm the Whisper model at start-up (set PRELOAD_WHISPER_MODEL=0 to load on first job); unload_model drops it on shutdown."""
+    if os.environ.get('PRELOAD_WHISPER_MODEL', '1') == '0':
+        return
+    try:
+        subtitle_service.preload_model()
+    except Exception as e:
+        # Jobs still load the model on demand
+        logger.warning(f"Model preload failed: {e}")
+
+def handle_sigterm(signum, frame):
+    """Shut down within the grace period, then exit (dev server; gunicorn uses worker_exit)."""
+    shutdown_services()
+    raise SystemExit(0)
 
 # Start resource monitoring
+atexit.register(shutdown_services)
 monitor_thread = threading.Thread(target=monitor_system_resources, daemon=True)
 monitor_thread.start()
 
+_TIME_RE = re.compile(r'(\d{1,2}):(\d{1,2}):(\d{1,2})[,.](\d{3})')
+
+def _parse_time_str(time_input):
+    """Parse a numeric string or HH:MM:SS,mmm timestamp to seconds."""
+    try:
+        return float(time_input)
+    except ValueError:
+        pass
+    
+    time_str = time_input.strip()
+    
+    # Fast path for the canonical HH:MM:SS,mmm / HH:MM:SS.mmm form
+    if (len(time_str) == 12 and time_str[2] == ':' and time_str[5] == ':' and time_str[8] in ',.'
+            and time_str.isascii() and (time_str[:2] + time_str[3:5] + time_str[6:8] + time_str[9:]).isdigit()):
+        o = ord
+        return ((o(time_str[0]) - 48) * 36000 + (o(time_str[1]) - 48) * 3600
+                + (o(time_str[3]) - 48) * 600 + (o(time_str[4]) - 48) * 60
+                + (o(time_str[6]) - 48) * 10 + (o(time_str[7]) - 48)
+                + ((o(time_str[9]) - 48) * 100 + (o(time_str[10]) - 48) * 10 + (o(time_str[11]) - 48)) / 1000.0)
+    
+    match = _TIME_RE.match(time_str)
+    
+    if match:
+        hours = int(match.group(1))
+        minutes = int(match.group(2))
+        seconds = int(match.group(3))
+        milliseconds = int(match.group(4))
+    
+        total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0
+        return total_seconds
+    
+    raise ValueError(f"Invalid time format: {time_input}")
+
+# Exact-type dispatch; JSON numbers arrive as int/float, timestamps as str
+_TIME_PARSERS = {float: float, int: float, bool: float, str: _parse_time_str}
+
 def parse_time_to_seconds(time_input):
     """Convert time format to seconds with enhanced parsing."""
+    parser = _TIME_PARSERS.get(type(time_input))
+    if parser is not None:
+        return parser(time_input)
+    
+    # Subclasses (e.g. numpy floats) take the slow path
     if isinstance(time_input, (int, float)):
         return float(time_input)
-    
     if isinstance(time_input, str):
-        try:
-            return float(time_input)
-        except ValueError:
-            pass
-        
-        time_pattern = r'(\d{1,2}):(\d{1,2}):(\d{1,2})[,.](\d{3})'
-        match = re.match(time_pattern, time_input.strip())
-        
-        if match:
-            hours = int(match.group(1))
-            minutes = int(match.group(2))
-            seconds = int(match.group(3))
-            milliseconds = int(match.group(4))
-            
-            total_seconds = hours * 3600 + minutes * 60 + seconds + milliseconds / 1000.0
-            return total_seconds
-        
-        raise ValueError(f"Invalid time format: {time_input}")
+        return _parse_time_str(time_input)
     
     raise ValueError(f"Unsupported time type: {type(time_input)}")
 
@@ -216,8 +672,7 @@ def set_performance_mode():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Enhanced health check with resource information."""
-    memory = psutil.virtual_memory()
-    cpu_percent = psutil.cpu_percent()
+    memory, cpu_percent = get_cached_resources()[1:]
     
     # Get model info if available
     model_info = {}
@@ -228,15 +683,15 @@ def health_check():
     
     health_data = {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "resources": {
             "memory_usage_percent": memory.percent,
             "memory_available_mb": memory.available / (1024 * 1024),
             "cpu_usage_percent": cpu_percent,
-            "workers": optimal_workers
+            "workers": executor.limit
         },
         "whisper_model": model_info,
-        "performance_stats": resource_stats
+        "performance_stats": performance_stats()
     }
     
     # Add warning if resources are constrained
@@ -249,42 +704,32 @@ def health_check():
 def add_subtitles():
     """Optimized subtitle addition with progress tracking."""
     try:
-        data = request.get_json()
-        
         logger.info("Processing optimized subtitle request")
         
-        if not data or 'url' not in data:
-            return jsonify({"error": "Missing required field: url"}), 400
+        try:
+            req = decode_request(AddSubtitlesRequest)
+        except msgspec.DecodeError as e:
+            return invalid_request_response(e)
         
         # Check system resources before accepting job
-        memory = psutil.virtual_memory()
+        memory = get_cached_resources().memory
         if memory.percent > MEMORY_CRITICAL_THRESHOLD * 100:
             return jsonify({
                 "error": "System memory critically low. Please try again later.",
                 "memory_usage": f"{memory.percent:.1f}%"
             }), 503
         
-        job_id = str(uuid.uuid4())
-        
-        # Optimized default settings for low-resource systems
-        default_settings = {
-            "language": "en",
-            "return_subtitles_file": True,
-            "word_level_mode": "karaoke",
-            "settings": {
-                "font-size": 80,  # Smaller font for memory efficiency
-                "font-family": "DejaVu-Sans-Bold",  # Simple font
-                "line-color": "#FFF4E9", 
-                "outline-width": 5,  # Reduced outline for performance
-                "normal-color": "#FFFFFF"
-            }
-        }
+        if executor.overloaded():
+            return overloaded_response()
+        
+        job_id = next_job_id()
         
         # Merge with provided settings
-        settings = {**default_settings, **data}
+        settings = msgspec.structs.asdict(req)
         
-        if "settings" in data:
-            settings["settings"] = {**default_settings["settings"], **data["settings"]}
+        style = DEFAULT_STYLE_SETTINGS.copy()
+        style.update(req.settings)
+        settings["settings"] = style
         
         # Create job with enhanced tracking
         job_manager.create_job(job_id, "add_subtitles", "pending", settings)
@@ -310,27 +755,15 @@ def add_subtitles():
 def split_video():
     """Optimized video splitting."""
     try:
-        data = request.get_json()
-        
-        has_url = 'url' in data
-        has_job_id = 'job_id' in data
-        
-        if not has_url and not has_job_id:
-            return jsonify({"error": "Must provide either 'url' or 'job_id'"}), 400
-        
-        if has_url and has_job_id:
-            return jsonify({"error": "Provide either 'url' or 'job_id', not both"}), 400
-        
-        # Validate time fields
-        required_time_fields = ['start_time', 'end_time'] 
-        for field in required_time_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        try:
+            req = decode_request(SplitVideoRequest)
+        except msgspec.DecodeError as e:
+            return invalid_request_response(e)
         
         # Parse and validate time formats
         try:
-            start_seconds = parse_time_to_seconds(data['start_time'])
-            end_seconds = parse_time_to_seconds(data['end_time'])
+            start_seconds = parse_time_to_seconds(req.start_time)
+            end_seconds = parse_time_to_seconds(req.end_time)
             
             if start_seconds >= end_seconds:
                 return jsonify({"error": "Start time must be less than end time"}), 400
@@ -342,17 +775,19 @@ def split_video():
             return jsonify({"error": f"Invalid time format: {str(e)}"}), 400
         
         # Check system resources
-        memory = psutil.virtual_memory()
+        memory = get_cached_resources().memory
         if memory.percent > MEMORY_WARNING_THRESHOLD * 100:
             logger.warning(f"Processing video split with high memory usage: {memory.percent:.1f}%")
         
-        job_id = str(uuid.uuid4())
+        if executor.overloaded():
+            return overloaded_response()
         
-        processed_data = {
-            **data,
-            'start_time': start_seconds,
-            'end_time': end_seconds
-        }
+        job_id = next_job_id()
+        
+        # Only the source that was given (url or job_id) is kept
+        processed_data = {key: value for key, value in msgspec.structs.asdict(req).items() if value is not None}
+        processed_data['start_time'] = start_seconds
+        processed_data['end_time'] = end_seconds
         
         job_manager.create_job(job_id, "split_video", "pending", processed_data)
         executor.submit(process_split_job_optimized, job_id, processed_data)
@@ -373,24 +808,24 @@ def split_video():
 def join_videos():
     """Optimized video joining."""
     try:
-        data = request.get_json()
-        
-        if not data or 'urls' not in data or not isinstance(data['urls'], list):
-            return jsonify({"error": "Missing required field: urls (must be an array)"}), 400
-        
-        if len(data['urls']) < 2:
-            return jsonify({"error": "At least 2 video URLs are required"}), 400
+        try:
+            data = msgspec.structs.asdict(decode_request(JoinVideosRequest))
+        except msgspec.DecodeError as e:
+            return invalid_request_response(e)
         
         # For many videos, warn about resource usage
         if len(data['urls']) > 5:
-            memory = psutil.virtual_memory()
+            memory = get_cached_resources().memory
             if memory.percent > MEMORY_WARNING_THRESHOLD * 100:
                 return jsonify({
                     "error": "Too many videos for current system resources. Try with fewer videos.",
                     "max_recommended": 3
                 }), 400
         
-        job_id = str(uuid.uuid4())
+        if executor.overloaded():
+            return overloaded_response()
+        
+        job_id = next_job_id()
         
         job_manager.create_job(job_id, "join_videos", "pending", data)
         executor.submit(process_join_job_optimized, job_id, data)
@@ -411,23 +846,24 @@ def join_videos():
 def add_music():
     """Optimized music addition."""
     try:
-        data = request.get_json()
+        try:
+            req = decode_request(AddMusicRequest)
+        except msgspec.DecodeError as e:
+            return invalid_request_response(e)
         
-        required_fields = ['video_url', 'music_url']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+        if executor.overloaded():
+            return overloaded_response()
         
-        job_id = str(uuid.uuid4())
+        job_id = next_job_id()
         
         settings = {
-            "volume": data.get('volume', 0.5),
-            "fade_in": data.get('fade_in', 0),
-            "fade_out": data.get('fade_out', 0),
-            "loop_music": data.get('loop_music', False)
+            "volume": req.volume,
+            "fade_in": req.fade_in,
+            "fade_out": req.fade_out,
+            "loop_music": req.loop_music
         }
         
-        job_data = {**data, "settings": settings}
+        job_data = {"video_url": req.video_url, "music_url": req.music_url, "settings": settings}
         
         job_manager.create_job(job_id, "add_music", "pending", job_data)
         executor.submit(process_music_job_optimized, job_id, job_data)
@@ -469,7 +905,7 @@ def get_job_status(job_id):
         
         # Add current system status for active jobs
         if job.get("status") in ["pending", "processing"]:
-            memory = psutil.virtual_memory()
+            memory = get_cached_resources().memory
             simplified_job["system_status"] = {
                 "memory_usage_percent": memory.percent,
                 "estimated_completion": "Processing optimized for your system"
@@ -484,27 +920,26 @@ def get_job_status(job_id):
 @app.route('/system-status', methods=['GET'])
 def get_system_status():
     """Get detailed system status and performance metrics."""
-    memory = psutil.virtual_memory()
-    cpu_percent = psutil.cpu_percent()
+    memory, cpu_percent = get_cached_resources()[1:]
     
     return jsonify({
         "memory": {
-            "total_gb": memory.total / (1024**3),
+            "total_gb": TOTAL_MEMORY_GB,
             "available_gb": memory.available / (1024**3),
             "usage_percent": memory.percent,
             "status": "critical" if memory.percent > 95 else "warning" if memory.percent > 85 else "normal"
         },
         "cpu": {
             "usage_percent": cpu_percent,
-            "core_count": psutil.cpu_count(),
+            "core_count": CPU_COUNT,
             "status": "warning" if cpu_percent > 90 else "normal"
         },
         "workers": {
-            "current": optimal_workers,
-            "active": len([t for t in threading.enumerate() if t.name.startswith("ThreadPoolExecutor")]),
-            "recommended": get_optimal_worker_count()
+            "current": executor.limit,
+            "active": executor.active,
+            "recommended": OPTIMAL_WORKERS
         },
-        "performance_stats": resource_stats,
+        "performance_stats": performance_stats(),
         "whisper_model": subtitle_service.get_model_info()
     })
 
@@ -513,6 +948,7 @@ def get_system_status():
 def process_subtitle_job_optimized(job_id, settings):
     """Optimized subtitle processing with progress tracking."""
     video_path = None
+    paths = JobPaths.from_id(job_id)
     start_time = time.time()
     
     try:
@@ -520,12 +956,12 @@ def process_subtitle_job_optimized(job_id, settings):
         job_manager.update_job_status(job_id, "processing", 10)
         
         # Log system state at start
-        memory_before = psutil.virtual_memory()
+        memory_before = get_cached_resources().memory
         logger.info(f"Starting subtitle job {job_id} with {memory_before.percent:.1f}% memory usage")
         
         # Download video
         video_url = settings['url']
-        video_path = download_file(video_url, 'temp', f"{job_id}_input.mp4")
+        video_path = download_file(video_url, TEMP_DIR, os.path.basename(paths.input))
         job_manager.update_job_status(job_id, "processing", 20)
         
         # Create progress callback function
@@ -545,7 +981,7 @@ def process_subtitle_job_optimized(job_id, settings):
         timing_analysis = subtitle_service.analyze_timing_gaps(subtitle_data)
         
         # Create video with subtitles using optimized service
-        output_path = f"temp/{job_id}_output.mp4"
+        output_path = paths.output
         word_mode = settings.get('word_level_mode', 'off')
         
         logger.info(f"Processing with {word_mode} mode using optimized video service")
@@ -566,13 +1002,13 @@ def process_subtitle_job_optimized(job_id, settings):
         # Handle subtitle file
         result = {"output_path": output_path}
         if settings.get('return_subtitles_file', False):
-            subtitle_path = f"temp/{job_id}_subtitles.srt"
+            subtitle_path = paths.subtitle
             subtitle_service.save_subtitle_file(subtitle_data, subtitle_path)
             result["subtitle_path"] = subtitle_path
         
         # Add processing info
         processing_time = time.time() - start_time
-        memory_after = psutil.virtual_memory()
+        memory_after = get_cached_resources().memory
         
         result["processing_info"] = {
             "processing_time_seconds": processing_time,
@@ -591,15 +1027,11 @@ def process_subtitle_job_optimized(job_id, settings):
         job_manager.fail_job(job_id, error_message)
         
         # Emergency cleanup on failure
-        if psutil.virtual_memory().percent > MEMORY_WARNING_THRESHOLD * 100:
+        if get_cached_resources().memory.percent > MEMORY_WARNING_THRESHOLD * 100:
             emergency_cleanup()
         
         # Clean up partial files
-        cleanup_files = [
-            f"temp/{job_id}_input.mp4",
-            f"temp/{job_id}_output.mp4", 
-            f"temp/{job_id}_subtitles.srt"
-        ]
+        cleanup_files = [paths.input, paths.output, paths.subtitle]
         for file_path in cleanup_files:
             if os.path.exists(file_path):
                 try:
@@ -610,6 +1042,7 @@ def process_subtitle_job_optimized(job_id, settings):
 
 def process_split_job_optimized(job_id, data):
     """Optimized video splitting."""
+    paths = JobPaths.from_id(job_id)
     start_time = time.time()
     
     try:
@@ -618,7 +1051,7 @@ def process_split_job_optimized(job_id, data):
         # Get video path
         if 'url' in data:
             video_url = data['url']
-            video_path = download_file(video_url, 'temp', f"{job_id}_input.mp4")
+            video_path = download_file(video_url, TEMP_DIR, os.path.basename(paths.input))
         elif 'job_id' in data:
             previous_job = job_manager.get_job(data['job_id'])
             if not previous_job or previous_job['status'] != 'completed':
@@ -628,7 +1061,7 @@ def process_split_job_optimized(job_id, data):
         job_manager.update_job_status(job_id, "processing", 50)
         
         # Split video with optimized service
-        output_path = f"temp/{job_id}_split.mp4"
+        output_path = paths.split
         video_service.split_video(
             video_path,
             data['start_time'],
@@ -654,21 +1087,20 @@ def process_split_job_optimized(job_id, data):
 
 def process_join_job_optimized(job_id, data):
     """Optimized video joining."""
+    paths = JobPaths.from_id(job_id)
     start_time = time.time()
     
     try:
         job_manager.update_job_status(job_id, "processing", 10)
         
-        # Download videos with progress
-        video_paths = []
-        for i, url in enumerate(data['urls']):
-            video_path = download_file(url, 'temp', f"{job_id}_input_{i}.mp4")
-            video_paths.append(video_path)
-            progress = 10 + (i + 1) * 30 // len(data['urls'])
-            job_manager.update_job_status(job_id, "processing", progress)
+        # Download videos concurrently on one event loop (I/O overlaps without extra worker threads)
+        video_paths = download_files_sync(
+            data['urls'], TEMP_DIR, [os.path.basename(paths.joined_input(i)) for i in range(len(data['urls']))]
+        )
+        job_manager.update_job_status(job_id, "processing", 40)
         
         # Join videos with optimized service
-        output_path = f"temp/{job_id}_joined.mp4"
+        output_path = paths.joined
         video_service.join_videos(video_paths, output_path)
         
         processing_time = time.time() - start_time
@@ -690,20 +1122,20 @@ def process_join_job_optimized(job_id, data):
 
 def process_music_job_optimized(job_id, data):
     """Optimized music addition."""
+    paths = JobPaths.from_id(job_id)
     start_time = time.time()
     
     try:
         job_manager.update_job_status(job_id, "processing", 10)
         
-        # Download files
-        video_path = download_file(data['video_url'], 'temp', f"{job_id}_video.mp4")
-        job_manager.update_job_status(job_id, "processing", 30)
-        
-        music_path = download_file(data['music_url'], 'temp', f"{job_id}_music.mp3")
+        # Download video and music concurrently
+        video_path, music_path = download_files_sync(
+            [data['video_url'], data['music_url']], TEMP_DIR, [os.path.basename(paths.video), os.path.basename(paths.music)]
+        )
         job_manager.update_job_status(job_id, "processing", 50)
         
         # Add music with optimized service
-        output_path = f"temp/{job_id}_with_music.mp4"
+        output_path = paths.with_music
         video_service.add_music_to_video(
             video_path,
             music_path,
@@ -727,6 +1159,21 @@ def process_music_job_optimized(job_id, data):
         logger.error(f"Music job {job_id} failed: {e}")
         job_manager.fail_job(job_id, str(e))
 
+# When set (e.g. "/internal/temp/"), downloads are handed to a fronting nginx that maps the
+# prefix to TEMP_DIR with an `internal; alias` location and serves the file with sendfile
+ACCEL_REDIRECT_PREFIX = os.environ.get('ACCEL_REDIRECT_PREFIX')
+
+def send_job_file(path, download_name=None):
+    """Send a job file as an attachment, via X-Accel-Redirect when configured."""
+    download_name = download_name or os.path.basename(path)
+    if not ACCEL_REDIRECT_PREFIX:
+        return send_file(path, as_attachment=True, download_name=download_name, conditional=True)
+    
+    response = app.response_class(mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream')
+    response.headers['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + os.path.relpath(path, TEMP_DIR)
+    response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response
+
 # Include all other endpoints from the original app.py
 @app.route('/download/<job_id>', methods=['GET'])
 def download_result(job_id):
@@ -741,7 +1188,7 @@ def download_result(job_id):
         if 'output_path' not in job:
             return jsonify({"error": "No output file available"}), 404
         
-        return send_file(job['output_path'], as_attachment=True)
+        return send_job_file(job['output_path'])
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -762,11 +1209,63 @@ def download_subtitles(job_id):
         if not os.path.exists(job['subtitle_path']):
             return jsonify({"error": "Subtitle file not found"}), 404
         
-        return send_file(job['subtitle_path'], as_attachment=True, download_name=f"{job_id}_subtitles.srt")
+        return send_job_file(job['subtitle_path'], download_name=os.path.basename(JobPaths.from_id(job_id).subtitle))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def free_space_by_device(paths):
+    """Available bytes on each filesystem holding one of paths, keyed by st_dev."""
+    free = {}
+    for path in paths:
+        try:
+            device = os.stat(path).st_dev
+            if device not in free:
+                vfs = os.statvfs(path)
+                free[device] = vfs.f_bavail * vfs.f_frsize
+        except OSError:
+            continue
+    return free
+
+def remove_directory_files(dir_name, measure=True):
+    """
+    Delete the regular files directly inside dir_name
+    
+    Returns (files removed, bytes freed), or None if the directory is missing; bytes
+    freed is only summed from per-file stats when measure is set (otherwise 0).
+    """
+    try:
+        dir_fd = os.open(dir_name, os.O_RDONLY | os.O_DIRECTORY)
+    except FileNotFoundError:
+        return None
+    
+    removed = freed = 0
+    try:
+        # One directory scan, then unlinkat() relative to the open directory - no per-file path lookups
+        with os.scandir(dir_fd) as entries:
+            files = [entry for entry in entries if entry.is_file(follow_symlinks=False)]
+        
+        for entry in files:
+            try:
+                file_size = entry.stat(follow_symlinks=False).st_size if measure else 0
+                os.unlink(entry.name, dir_fd=dir_fd)
+            except OSError as e:
+                logger.error(f"Could not remove {os.path.join(dir_name, entry.name)}: {e}")
+                continue
+            removed += 1
+            freed += file_size
+    finally:
+        os.close(dir_fd)
+    
+    return removed, freed
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+def format_size(bytes_size):
+    """Human-readable size; the unit comes from bit_length instead of a division loop."""
+    unit = min(max(0, (int(bytes_size).bit_length() - 1) // 10), len(SIZE_UNITS) - 1)
+    return f"{bytes_size / (1 << (10 * unit)):.2f} {SIZE_UNITS[unit]}"
+
 @app.route('/admin/cleanup', methods=['POST'])
 def cleanup_all():
     """Enhanced cleanup with resource monitoring."""
@@ -775,6 +1274,7 @@ def cleanup_all():
         
         # Force memory cleanup first
         emergency_cleanup()
+        monitor_resample.set()
         
         cleanup_stats = {
             "jobs_removed": 0,
@@ -788,51 +1288,57 @@ def cleanup_all():
         # Clean up directories (same as original but with better logging)
         directories = [
             ('jobs', 'jobs'),
-            ('temp', 'temp'),
+            (TEMP_DIR, 'temp'),
             ('uploads', 'uploads'),
             ('static', 'static')
         ]
         
+        # Space freed is measured as the filesystems' free-space delta (no per-file stat),
+        # falling back to summing file sizes where statvfs is unavailable
+        use_statvfs = hasattr(os, 'statvfs')
+        if use_statvfs:
+            free_before = free_space_by_device(dir_name for dir_name, _ in directories)
+        
         for dir_name, stat_key in directories:
-            if os.path.exists(dir_name):
-                for file_name in os.listdir(dir_name):
-                    file_path = os.path.join(dir_name, file_name)
-                    if os.path.isfile(file_path):
-                        try:
-                            file_size = os.path.getsize(file_path)
-                            os.remove(file_path)
-                            cleanup_stats[f"{stat_key}_removed"] += 1
-                            cleanup_stats["total_size_freed"] += file_size
-                            logger.info(f"Removed {stat_key} file: {file_path}")
-                        except Exception as e:
-                            logger.error(f"Could not remove {file_path}: {e}")
-                cleanup_stats["directories_cleaned"].append(dir_name)
-        
-        # Format size
-        def format_size(bytes_size):
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if bytes_size < 1024.0:
-                    return f"{bytes_size:.2f} {unit}"
-                bytes_size /= 1024.0
-            return f"{bytes_size:.2f} TB"
+            result = remove_directory_files(dir_name, measure=not use_statvfs)
+            if result is None:
+                continue
+            removed, freed = result
+            cleanup_stats[f"{stat_key}_removed"] += removed
+            cleanup_stats["total_size_freed"] += freed
+            logger.info("Removed %d %s files from %s", removed, stat_key, dir_name)
+            cleanup_stats["directories_cleaned"].append(dir_name)
+        
+        if use_statvfs:
+            free_after = free_space_by_device(dir_name for dir_name, _ in directories)
+            # Concurrent writers can shrink free space meanwhile; never report a negative size
+            cleanup_stats["total_size_freed"] = max(0, sum(
+                free_after[device] - free_before[device] for device in free_before.keys() & free_after.keys()
+            ))
+        
+        # Job files are gone - drop the in-memory copies too
+        job_manager.clear()
         
         cleanup_stats["total_size_freed_formatted"] = format_size(cleanup_stats["total_size_freed"])
         
+        # One fresh post-cleanup reading (max_age=0), shared below and with other handlers
+        memory_after = get_cached_resources(max_age=0).memory
+        
         # Reset performance stats
+        resource_stats["warnings"].clear()
         resource_stats.update({
-            "peak_memory": psutil.virtual_memory().percent / 100.0,
-            "warnings": [],
+            "peak_memory": memory_after.percent / 100.0,
             "job_count": 0
         })
         
-        logger.info(f"Cleanup completed! Freed {cleanup_stats['total_size_freed_formatted']}")
+        logger.info("Cleanup completed! Freed %s", cleanup_stats['total_size_freed_formatted'])
         
         return jsonify({
             "status": "success",
             "message": "Enhanced cleanup completed with resource optimization",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "cleanup_stats": cleanup_stats,
-            "memory_after_cleanup": f"{psutil.virtual_memory().percent:.1f}%"
+            "memory_after_cleanup": f"{memory_after.percent:.1f}%"
         })
         
     except Exception as e:
@@ -840,21 +1346,13 @@ def cleanup_all():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    # Create necessary directories
-    os.makedirs('temp', exist_ok=True)
-    os.makedirs('uploads', exist_ok=True)
-    os.makedirs('jobs', exist_ok=True)
-    
-    logger.info(f"Starting optimized VideoEditorAPI with {optimal_workers} workers")
-    logger.info(f"System: {psutil.virtual_memory().total/(1024**3):.1f}GB RAM, {psutil.cpu_count()} CPU cores")
+    # Development server; production runs `gunicorn -c gunicorn_conf.py app_optimized:app`
+    logger.info("Starting optimized VideoEditorAPI with %d workers", executor.limit)
+    logger.info("System: %.1fGB RAM, %d CPU cores", TOTAL_MEMORY_GB, CPU_COUNT)
+    preload_subtitle_model()
     
     # Use port from environment or default to 8080
     port = int(os.environ.get('PORT', 8080))
     
-    try:
-        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
-    finally:
-        # Clean shutdown
-        monitoring_active = False
-        executor.shutdown(wait=True)
-        subtitle_service.unload_model()
\ No newline at end of file
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Gunicorn configuration for the optimized API
+
+Run with: gunicorn -c gunicorn_conf.py app_optimized:app
+
+Jobs, their in-memory state and the adaptive worker pool live in the serving process,
+so there is exactly one worker process; request concurrency comes from its threads.
+"""
+import os
+
+# TCP by default; set BIND=unix:/tmp/veapi.sock when running behind a local reverse proxy
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 8080)}")
+
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Keep connections open between status polls
+keepalive = 75
+
+# Requests only enqueue jobs; long work runs on the app's own executor
+timeout = 120
+graceful_timeout = 30
+
+def post_worker_init(worker):
+    """Load and warm the Whisper model before the worker takes requests."""
+    from app_optimized import preload_subtitle_model
+    preload_subtitle_model()
+
+def worker_exit(server, worker):
+    """Bounded shutdown of the app's job executor before the worker process exits."""
+    from app_optimized import shutdown_services
+    shutdown_services()